@@ -0,0 +1,70 @@
+"""
+Count the pages fetched by queries with and without link filters,
+or looking only for how the start words are connected.
+
+Every query starts from an empty API cache and is answered by a stub API
+serving the pages of the cache file, so the counts are those of cold queries:
+
+    python -m benchmarks.filters --word en:water --word ro:lup
+"""
+from __future__ import annotations
+
+import argparse
+
+from src.wiketym.query import Query
+from src.wiketym.word import Word
+from src.wiketym.wiktionary import Page
+from src.wiketym.wiktionary.api import API
+from src.wiketym.wiktionary.stub import StubServer
+
+PAGES = "benchmarks/data/pages.json"
+"""Pages of `en:water` and `ro:lup`, their ancestors and a few redirects."""
+
+FILTERS = {
+    "none": {},
+    "strong links": {"allowed_links": Query.ALL_LINKS - Query.WEAK_LINKS},
+    "attested terms": {"reconstructed": False},
+    "Indo-European proto-languages": {"languages": {"ine", "gem", "itc", "grk"}},
+    "connect": {"connect": True},
+}
+
+
+def fetches(words: list[tuple[str, str]], **options) -> int:
+    """Number of API calls made by a cold query."""
+    Word.clear()
+    Page.registry.clear()
+    API._cache = {}
+    misses = API.stats["misses"]
+    Query(
+        [Word(lemma, lang_code) for lang_code, lemma in words],
+        render=False,
+        disambiguate=False,
+        max_fetches=None,
+        max_nodes=None,
+        deadline=None,
+        **options,
+    )
+    return API.stats["misses"] - misses
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--word", action="append", help="start word, lang_code:lemma")
+    parser.add_argument("--cache", default=PAGES, help="pages to serve")
+    parser.add_argument("--max-level", type=int, default=5)
+    args = parser.parse_args()
+    words = [tuple(word.split(":", maxsplit=1)) for word in args.word or ["en:water", "ro:lup"]]
+
+    cache = API._cache
+    try:
+        with StubServer.from_cache(args.cache) as stub:
+            API.url = stub.url
+            for name, options in FILTERS.items():
+                count = fetches(words, max_level=args.max_level, **options)
+                print(f"{name:>30}: {count} fetches")
+    finally:
+        API._cache = cache
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Time whole queries, the share of it spent on cycle checks when linking words,
+and the memory they allocate, against a stub API serving the benchmark pages.
+
+Each query runs cold, from an empty API cache, then warm, with every response
+cached but the pages and words parsed again. Warm times are medians.
+Run from the repository root with `python -m benchmarks.graph`.
+"""
+import statistics
+import time
+import tracemalloc
+
+from src.wiketym.query import Query
+from src.wiketym.trace import Tracer
+from src.wiketym.word import Word
+from src.wiketym.wiktionary import Page
+from src.wiketym.wiktionary.api import API
+from src.wiketym.wiktionary.stub import StubServer
+
+from .filters import PAGES
+
+QUERIES = {
+    "en:water": ([("water", "en")], {}),
+    "ro:lup": ([("lup", "ro")], {}),
+    "both, connected": ([("water", "en"), ("lup", "ro")], {"connect": True}),
+}
+
+
+def measure(words: list[tuple[str, str]], **options) -> tuple[float, float, int, int]:
+    """Seconds of the query and of its cycle checks, peak bytes and words found."""
+    Word.clear()
+    Page.registry.clear()
+    tracer = Tracer()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with tracer.active():
+        query = Query(
+            [Word(lemma, lang_code) for lemma, lang_code in words],
+            render=False,
+            disambiguate=False,
+            max_level=5,
+            max_fetches=None,
+            max_nodes=None,
+            deadline=None,
+            **options,
+        )
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    checks = sum(e["dur"] for e in tracer.events if e["name"] == "cycle check")
+    return elapsed, checks / 1e6, peak, len(query.G)
+
+
+def main(repeat: int = 20) -> None:
+    cache = API._cache
+    try:
+        with StubServer.from_cache(PAGES) as stub:
+            API.url = stub.url
+            for name, (words, options) in QUERIES.items():
+                API._cache = {}
+                cold = measure(words, **options)
+                warm = [measure(words, **options) for _ in range(repeat)]
+                elapsed, checks, peak, nodes = (
+                    statistics.median(run[i] for run in warm) for i in range(4)
+                )
+                print(
+                    f"{name}: {nodes:.0f} words, "
+                    f"cold {cold[0] * 1000:.1f} ms, "
+                    f"warm {elapsed * 1000:.1f} ms "
+                    f"(cycle checks {checks * 1000:.2f} ms), "
+                    f"{peak / 1024:.0f} KiB"
+                )
+    finally:
+        API._cache = cache
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Compare the cost of rendering a graph with graphviz on the server
+against serialising it to JSON for rendering in the browser.
+
+Run from the repository root with `python -m benchmarks.render`.
+"""
+import timeit
+
+from src.wiketym.query import Query
+from src.wiketym.word import Word
+
+WORDS = [("water", "en"), ("wheel", "en"), ("apă", "ro"), ("Wasser", "de")]
+
+
+def main(repeat: int = 5) -> None:
+    for lemma, lang_code in WORDS:
+        graph = Query([Word(lemma, lang_code)], render=False).G
+        render = timeit.timeit(lambda: graph.render("benchmark"), number=repeat)
+        to_json = timeit.timeit(graph.to_json, number=repeat)
+        print(
+            f"{lemma} ({lang_code}): {len(graph)} nodes, {len(graph.edges)} edges, "
+            f"render {render / repeat * 1000:.1f} ms, "
+            f"json {to_json / repeat * 1000:.2f} ms "
+            f"({len(graph.to_json())} bytes)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Replay a request log against a running app, to measure its capacity.
+
+Start a stub Wiktionary API and the app using it, for example:
+
+    python -m src.wiketym.wiktionary.stub benchmarks/data/pages.json --port 8080
+    WIKETYM_API_URL=http://localhost:8080/w/api.php gunicorn -w 4 web:app
+
+then replay a log written through `WIKETYM_REQUEST_LOG`:
+
+    python -m benchmarks.replay requests.log --url http://localhost:8000 \\
+        --concurrency 4 --rate 2
+
+or let the replay start both, with `--stub benchmarks/data/pages.json`.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import requests
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Replay:
+    """
+    Send the logged requests at a fixed `rate` per second,
+    with at most `concurrency` of them in flight.
+
+    Latencies are measured from the time each request was due,
+    so time spent waiting for a free connection counts as well.
+    """
+
+    def __init__(self, entries: list[dict], url: str, concurrency: int, rate: float):
+        self.entries = entries
+        self.url = url.rstrip("/")
+        self.concurrency = concurrency
+        self.rate = rate
+        self.latencies: list[float] = []
+        self.errors: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_log(cls, path: str, limit: int | None = None, **kwargs) -> Replay:
+        with open(path, encoding="utf-8") as file:
+            entries = [json.loads(line) for line in file if line.strip()]
+        return cls(entries[:limit], **kwargs)
+
+    def _send(self, entry: dict, due: float) -> None:
+        time.sleep(max(0, due - time.monotonic()))
+        error = None
+        try:
+            response = requests.get(self.url + entry["path"], entry["args"])
+            if response.status_code >= 400:
+                error = str(response.status_code)
+        except requests.RequestException as exc:
+            error = type(exc).__name__
+        latency = time.monotonic() - due
+        with self._lock:
+            self.latencies.append(latency)
+            if error:
+                self.errors[error] = self.errors.get(error, 0) + 1
+
+    def run(self) -> dict:
+        start = time.monotonic()
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            for i, entry in enumerate(self.entries):
+                pool.submit(self._send, entry, start + i / self.rate)
+        elapsed = time.monotonic() - start
+        return {
+            "requests": len(self.latencies),
+            "errors": self.errors,
+            "throughput": len(self.latencies) / elapsed if elapsed else 0,
+            "p50": percentile(self.latencies, 0.50),
+            "p95": percentile(self.latencies, 0.95),
+            "p99": percentile(self.latencies, 0.99),
+        }
+
+
+@contextmanager
+def served_app(cache: str, workers: int, port: int = 8000):
+    """
+    Run the app with gunicorn, using a stub API serving the pages of `cache`
+    and a response store of its own, in a temporary file. No cache shared
+    with other hosts, snapshot or request log is used, so runs stay comparable.
+    """
+    from src.wiketym.wiktionary.stub import StubServer
+
+    isolated = {"WIKETYM_L2_URL", "WIKETYM_SNAPSHOT", "WIKETYM_REQUEST_LOG"}
+    with StubServer.from_cache(cache) as stub, tempfile.TemporaryDirectory() as tmp:
+        env = {k: v for k, v in os.environ.items() if k not in isolated} | {
+            "WIKETYM_API_URL": stub.url,
+            "WIKETYM_CACHE_DB": os.path.join(tmp, "cache.sqlite"),
+        }
+        command = ["gunicorn", "-w", str(workers), "-b", f"127.0.0.1:{port}"]
+        app = subprocess.Popen(command + ["web:app"], env=env)
+        url = f"http://127.0.0.1:{port}"
+        try:
+            for _ in range(600):
+                try:
+                    requests.get(url + "/stats", timeout=1)
+                    break
+                except requests.ConnectionError:
+                    time.sleep(0.1)
+            yield url
+        finally:
+            app.terminate()
+            app.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("log", help="request log, one JSON object per line")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=1, help="requests per second")
+    parser.add_argument("--limit", type=int, help="replay only the first requests")
+    parser.add_argument("--stub", help="start the app against a stub of this cache")
+    parser.add_argument("--workers", type=int, default=4, help="workers with --stub")
+    args = parser.parse_args()
+
+    kwargs = dict(limit=args.limit, concurrency=args.concurrency, rate=args.rate)
+    if args.stub:
+        with served_app(args.stub, args.workers) as url:
+            report = Replay.from_log(args.log, url=url, **kwargs).run()
+    else:
+        report = Replay.from_log(args.log, url=args.url, **kwargs).run()
+    print(f"{report['requests']} requests, {report['throughput']:.2f}/s")
+    print(f"p50 {report['p50']:.3f}s p95 {report['p95']:.3f}s p99 {report['p99']:.3f}s")
+    print(f"errors: {report['errors'] or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Compare gunicorn startup with and without the warm start of `gunicorn.conf.py`.
+
+For each mode, report the time until every worker serves requests,
+the time to replace a killed worker, and the unique memory (USS) of each
+worker, i.e. the memory it does not share with the master or other workers.
+Linux only, as memory is read from `/proc`.
+
+    python -m benchmarks.startup --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import subprocess
+import time
+
+import requests
+
+
+def children(pid: int) -> set[int]:
+    with open(f"/proc/{pid}/task/{pid}/children", encoding="utf-8") as file:
+        return set(map(int, file.read().split()))
+
+
+def uss(pid: int) -> int:
+    """Bytes of memory private to the process `pid`."""
+    total = 0
+    with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as file:
+        for line in file:
+            if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                total += int(line.split()[1]) * 1024
+    return total
+
+
+def wait(condition, timeout: float = 300) -> float:
+    """Seconds until `condition()` holds."""
+    start = time.monotonic()
+    while not condition():
+        if time.monotonic() - start > timeout:
+            raise TimeoutError
+        time.sleep(0.05)
+    return time.monotonic() - start
+
+
+def serving(url: str, pids: set[int], served: set[int]) -> bool:
+    """Whether all the worker `pids` have served a request, recorded in `served`."""
+    try:
+        served.add(requests.get(url + "/stats", timeout=1).json()["pid"])
+    except requests.RequestException:
+        pass
+    return pids <= served
+
+
+def measure(preload: bool, workers: int, port: int) -> dict:
+    env = os.environ | {"WIKETYM_PRELOAD": "1" if preload else "0"}
+    command = ["gunicorn", "-w", str(workers), "-b", f"127.0.0.1:{port}", "web:app"]
+    master = subprocess.Popen(command, env=env, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    served: set[int] = set()
+    try:
+        startup = wait(lambda: len(children(master.pid)) == workers)
+        startup += wait(lambda: serving(url, children(master.pid), served))
+        memory = sorted(uss(pid) for pid in children(master.pid))
+
+        victim = min(children(master.pid))
+        os.kill(victim, signal.SIGKILL)
+        restart = wait(
+            lambda: len(children(master.pid) - {victim}) == workers
+            and serving(url, children(master.pid), served)
+        )
+        return {"startup": startup, "restart": restart, "uss": memory}
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    for preload in (False, True):
+        result = measure(preload, args.workers, args.port)
+        mib = ", ".join(f"{size / 2**20:.0f}" for size in result["uss"])
+        print(f"{'warm' if preload else 'cold'} start:")
+        print(f"  startup {result['startup']:.2f}s, restart {result['restart']:.2f}s")
+        print(f"  worker USS (MiB): {mib}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Compare the layout time of big graphs with that of their summaries
+of at most so many words, which should grow with that bound only.
+
+Run from the repository root with `python -m benchmarks.summarize`.
+"""
+import timeit
+
+from src.wiketym.query import Query
+from src.wiketym.word import Word
+
+WORDS = [("water", "en"), ("wheel", "en"), ("mother", "en"), ("Wasser", "de")]
+TARGETS = [50, 100, 150]
+
+
+def main(repeat: int = 3) -> None:
+    for lemma, lang_code in WORDS:
+        graph = Query(
+            [Word(lemma, lang_code)],
+            render=False,
+            reduce=False,
+            max_count=10,
+            max_count_weak=10,
+        ).G
+        for target in [None] + TARGETS:
+            summary = graph.summarize(target) if target else graph
+            render = timeit.timeit(lambda: summary.render("benchmark"), number=repeat)
+            print(
+                f"{lemma} ({lang_code}) <= {target or 'all'}: "
+                f"{len(summary)} nodes, {summary.number_of_edges()} edges, "
+                f"render {render / repeat * 1000:.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
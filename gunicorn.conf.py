@@ -0,0 +1,33 @@
+"""
+Gunicorn settings, read by default from the working directory.
+
+The app is imported once in the master and warmed up before forking,
+so workers start at once and share the model, the language tables
+and the cached pages copy-on-write. Set `WIKETYM_PRELOAD=0` to import
+the app in each worker instead, which then warms up on its own.
+"""
+import os
+
+preload_app = os.environ.get("WIKETYM_PRELOAD", "1") != "0"
+
+hot_pages = int(os.environ.get("WIKETYM_HOT_PAGES", 500))
+"""Number of the most requested pages to parse before forking."""
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from src.wiketym import warm
+    from web import REQUEST_LOG
+
+    titles = warm.hot_titles(REQUEST_LOG, hot_pages) if REQUEST_LOG else []
+    warm.warm_up(titles)
+    server.log.info("Warmed up %d pages before forking", len(titles))
+
+
+def post_worker_init(worker):
+    if preload_app:
+        return
+    from src.wiketym import warm
+
+    warm.warm_up()
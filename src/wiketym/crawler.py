@@ -0,0 +1,170 @@
+"""
+Crawler filling the API cache with the ancestors of popular words,
+so that queries about them do not wait for Wiktionary.
+
+Run it off-peak (e.g. from cron) with the most requested words of a request log,
+or with words given as `lang_code:lemma`:
+
+    python -m src.wiketym.crawler --log requests.log --depth 4 --rate 1
+    python -m src.wiketym.crawler --word la:aqua --word ro:apă
+
+Progress is saved to a state file, so an interrupted crawl continues
+where it stopped when run again with the same arguments.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from collections import deque
+from typing import Iterable
+
+from .helpers import dump_json, load_json
+from .link_filter import LinkFilter
+from .link_index import Key, canonical
+from .query import Query
+from .warm import popular
+from .word import Word
+from .wiktionary.api import API
+
+
+class Crawler:
+    """
+    Breadth-first expansion of the links of `Word`s from `roots`, down to `depth`,
+    which only fetches pages: nothing is disambiguated, merged or rendered.
+    """
+
+    STRONG_LINKS = Query.ALL_LINKS - Query.WEAK_LINKS
+
+    def __init__(
+        self,
+        roots: Iterable[Key],
+        depth: int = 3,
+        links: set[str] = STRONG_LINKS,
+        state_path: str | None = None,
+        checkpoint: int = 50,
+    ) -> None:
+        self.depth = depth
+        """Maximum distance from the roots of the words whose pages are fetched."""
+        self.links = links
+        """Link types followed."""
+        self.state_path = state_path
+        """File to save the progress to, and resume it from."""
+        self.checkpoint = checkpoint
+        """Number of words expanded between saves."""
+
+        self.roots: list[Key] = [canonical(*key) for key in roots]
+        self.queue: deque[tuple[Key, int]] = deque((key, 0) for key in self.roots)
+        """Words left to expand, with their distance from the roots."""
+        self.done: set[Key] = set()
+        """Words expanded so far."""
+        self.fetches = 0
+        """Number of actual API calls made by this crawler."""
+
+        if state_path and os.path.exists(state_path):
+            self._load()
+        self.seen: set[Key] = self.done | {key for key, _ in self.queue}
+        """Words either expanded or queued."""
+
+    def run(self, max_fetches: int | None = None, rate: float | None = None) -> dict:
+        """
+        Expand the queued words until none are left or `max_fetches` is reached,
+        making at most `rate` API calls per second.
+        Return the coverage report.
+        """
+        min_interval = API.min_interval
+        if rate:
+            API.min_interval = max(min_interval, 1 / rate)
+        misses = API.stats["misses"]
+        expanded = 0
+        try:
+            while self.queue:
+                if max_fetches is not None:
+                    if API.stats["misses"] - misses >= max_fetches:
+                        break
+                key, level = self.queue[0]
+                self._expand(Word(*key), level)
+                self.queue.popleft()
+                self.done.add(key)
+                expanded += 1
+                if expanded % self.checkpoint == 0:
+                    self.save()
+        finally:
+            API.min_interval = min_interval
+            self.fetches += API.stats["misses"] - misses
+            self.save()
+        return self.coverage()
+
+    def _expand(self, word: Word, level: int) -> None:
+        """Fetch the page of `word` and queue its related words within `depth`."""
+        if level >= self.depth:
+            bool(word)  # fetch its entry only
+            return
+        for related_words in word.related(LinkFilter(self.links)).values():
+            for related_word in related_words:
+                if related_word.key not in self.seen:
+                    self.seen.add(related_word.key)
+                    self.queue.append((related_word.key, level + 1))
+
+    def coverage(self) -> dict:
+        """How much of the closure of the roots is in the API cache."""
+        cached = sum(1 for key in self.seen if self._cached(Word(*key).page_title))
+        return {
+            "roots": len(self.roots),
+            "expanded": len(self.done),
+            "pending": len(self.queue),
+            "cached": cached,
+            "coverage": cached / len(self.seen) if self.seen else 1,
+            "fetches": self.fetches,
+        }
+
+    @staticmethod
+    def _cached(title: str) -> bool:
+        return title in API._cache or f"{title}#sections" in API._cache
+
+    def save(self) -> None:
+        """Persist the progress, if there is a state file."""
+        if self.state_path:
+            dump_json(
+                self.state_path,
+                {
+                    "depth": self.depth,
+                    "roots": self.roots,
+                    "done": sorted(self.done),
+                    "queue": [[*key, level] for key, level in self.queue],
+                },
+            )
+        Word.clear()  # only keys are kept between words
+
+    def _load(self) -> None:
+        state = load_json(self.state_path)
+        if state["depth"] != self.depth:
+            raise ValueError(
+                f"{self.state_path} was crawled to depth {state['depth']}, "
+                f"not {self.depth}"
+            )
+        self.roots = [tuple(key) for key in state["roots"]]
+        self.done = {tuple(key) for key in state["done"]}
+        self.queue = deque(
+            ((lemma, lang_code), level) for lemma, lang_code, level in state["queue"]
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--log", help="request log to take the most requested words")
+    parser.add_argument("--top", type=int, default=100, help="words taken from --log")
+    parser.add_argument(
+        "--word", action="append", default=[], help="root word, as lang_code:lemma"
+    )
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--rate", type=float, default=1, help="API calls per second")
+    parser.add_argument("--max-fetches", type=int, help="stop after this many calls")
+    parser.add_argument("--state", default="crawl.json", help="progress file")
+    args = parser.parse_args()
+
+    roots = popular(args.log, args.top) if args.log else []
+    roots += [tuple(reversed(word.split(":", maxsplit=1))) for word in args.word]
+    crawler = Crawler(roots, depth=args.depth, state_path=args.state)
+    report = crawler.run(max_fetches=args.max_fetches, rate=args.rate)
+    for name, value in report.items():
+        print(f"{name}: {value:.1%}" if name == "coverage" else f"{name}: {value}")
@@ -1,12 +1,58 @@
 """Provides support for building etymology trees."""
-from functools import cache
 
-import graphviz
+import json
+import textwrap
+from collections import Counter, defaultdict
+from itertools import count
+from typing import Iterator
+
 import networkx as nx
 
 from .helpers import load_json
+from .render import renderer
 
 from .word import Word
+from .wiktionary import Language
+
+
+class Group:
+    """Words of a summarized graph, shown as a single node."""
+
+    level = None
+    frontier = False
+    _ids = count()
+
+    def __init__(self, words: list, lang: Language | None, label: str) -> None:
+        self.words = words
+        """Words (or groups) shown by this node."""
+        self.lang = lang
+        """Common language of the words, if any."""
+        self.label = label
+        self.id = next(self._ids)
+        """Number telling apart groups with the same label in DOT sources."""
+
+    @property
+    def lemmas(self) -> list[str]:
+        return [
+            lemma
+            for word in self.words
+            for lemma in (word.lemmas if isinstance(word, Group) else [word.lemma])
+        ]
+
+    @property
+    def node(self) -> dict:
+        text = []
+        if self.lang:
+            text.append(f'<font point-size="10">{self.lang.name}</font>')
+        text.append(f"<b>{self.label}</b>")
+        lemmas = ", ".join(self.lemmas)
+        text.append(
+            f"""<font point-size="10"><i>{"<br/>".join(textwrap.wrap(lemmas, 30)[:3])}</i></font>"""
+        )
+        return {"label": "<" + "<br/>".join(text) + ">"} | Word.NODE_STYLES["group"]
+
+    def __repr__(self) -> str:
+        return f"{self.label} #{self.id}"
 
 
 class EtyGraph(nx.DiGraph):
@@ -16,30 +62,121 @@ class EtyGraph(nx.DiGraph):
         super().__init__(incoming_graph_data, **attr)
 
     EDGE_STYLES = load_json("src/wiketym/data/styles.json")["edges"]
+    NODE_STYLES = Word.NODE_STYLES
 
-    @cache
-    def add(self, word: Word) -> None:
-        super().add_node(word, **word.node)
-
-    def refresh(self, word: Word) -> None:
-        for attr_key, attr_value in word.node.items():
-            self.nodes[word][attr_key] = attr_value
-
-    def link(self, from_word: Word, to_word: Word, link_type: str) -> None:
-        super().add_edge(from_word, to_word, **self.EDGE_STYLES[link_type])
-        if not nx.algorithms.is_directed_acyclic_graph(self):
-            self.remove_edge(from_word, to_word)
+    WEAK_LINKS = {"mentioned", "linked"}
 
     def reduce(self):
         reduced = EtyGraph(nx.algorithms.transitive_reduction(self))
+        reduced.graph.update(self.graph)
         reduced.add_nodes_from(self.nodes(data=True))
         reduced.add_edges_from((u, v, self.edges[u, v]) for u, v in reduced.edges)
         return reduced
 
+    def summarize(self, max_nodes: int) -> "EtyGraph":
+        """
+        Copy of the graph shrunk towards `max_nodes` nodes, which bounds
+        the cost of its layout, by steps each losing more information
+        than the previous one, until small enough:
+        weak leaves of a word are grouped, chains of same-language words
+        are collapsed, then the words of the biggest languages are clustered.
+
+        Start words and words cut short by a budget are always kept.
+        """
+        summary = self.copy()
+        for step in (
+            summary._group_weak_leaves,
+            summary._collapse_chains,
+            summary._cluster_languages,
+        ):
+            if len(summary) <= max_nodes:
+                break
+            step(max_nodes)
+        return summary
+
+    def _kept(self, node) -> bool:
+        return isinstance(node, Word) and (node.level == 0 or node.frontier)
+
+    def _group(self, nodes: list, group: Group) -> None:
+        """Replace `nodes` by `group`, which inherits their edges."""
+        self.add_node(group, **group.node)
+        members = set(nodes)
+        for node in nodes:
+            for u, _, data in self.in_edges(node, data=True):
+                if u not in members and not self.has_edge(u, group):
+                    self.add_edge(u, group, **data)
+            for _, v, data in self.out_edges(node, data=True):
+                if v not in members and not self.has_edge(group, v):
+                    self.add_edge(group, v, **data)
+        self.remove_nodes_from(nodes)
+
+    def _group_weak_leaves(self, max_nodes: int) -> None:
+        """Group the words linked only by one weak link to the same word."""
+        leaves = defaultdict(list)
+        for node in self:
+            if self.degree(node) != 1 or self._kept(node):
+                continue
+            if self.out_degree(node):
+                _, other, link_type = next(iter(self.out_edges(node, "link_type")))
+            else:
+                other, _, link_type = next(iter(self.in_edges(node, "link_type")))
+            if link_type in self.WEAK_LINKS:
+                leaves[other, link_type, bool(self.out_degree(node))].append(node)
+        for (_, link_type, _), nodes in leaves.items():
+            if len(self) <= max_nodes:
+                return
+            if len(nodes) > 1:
+                label = f"{len(nodes)} words {link_type.replace('_', ' ')}"
+                self._group(nodes, Group(nodes, None, label))
+
+    def _collapse_chains(self, max_nodes: int) -> None:
+        """
+        Remove the words with a single parent and a single child
+        in the language of either of them, linking those two directly.
+        The link kept is the one changing language, if any.
+        """
+        for node in list(self):
+            if len(self) <= max_nodes:
+                return
+            if self.in_degree(node) != 1 or self.out_degree(node) != 1:
+                continue
+            if self._kept(node) or isinstance(node, Group):
+                continue
+            (u, _, in_data), (_, v, out_data) = (
+                next(iter(self.in_edges(node, data=True))),
+                next(iter(self.out_edges(node, data=True))),
+            )
+            if node.lang not in (getattr(u, "lang", None), getattr(v, "lang", None)):
+                continue
+            data = out_data if node.lang == getattr(u, "lang", None) else in_data
+            skipped = in_data.get("skipped", 0) + out_data.get("skipped", 0) + 1
+            self.remove_node(node)
+            if not self.has_edge(u, v):
+                label = f'"{skipped} skipped"'
+                self.add_edge(u, v, **data | {"skipped": skipped, "label": label})
+
+    def _cluster_languages(self, max_nodes: int) -> None:
+        """Cluster the words of a language, from the language with most words."""
+        languages = Counter(
+            node.lang
+            for node in self
+            if isinstance(node, Word) and not self._kept(node)
+        )
+        for lang, words in languages.most_common():
+            if len(self) <= max_nodes or words < 2:
+                return
+            nodes = [
+                node
+                for node in self
+                if isinstance(node, Word) and node.lang == lang and not self._kept(node)
+            ]
+            self._group(nodes, Group(nodes, lang, f"{len(nodes)} words"))
+
     def render(self, filename):
         source = nx.nx_pydot.to_pydot(self).to_string()
-        dot = graphviz.Source(source).unflatten(5)
-        dot.render(f"outputs/{filename}")
+        renderer.render(
+            source, f"outputs/{filename}.pdf", len(self), self.number_of_edges()
+        )
 
     def merge(self):
         edges: list[tuple[Word, Word]] = []
@@ -60,9 +197,66 @@ class EtyGraph(nx.DiGraph):
             if not v.meaning:
                 v._template_meaning = u.meaning
             self.nodes[u]["label"] = v.node["label"]
+            self.graph.setdefault("aliases", {})[u] = v
             if v in self:
                 self.remove_node(v)
 
+    def iter_json(self) -> Iterator[str]:
+        """
+        Serialise the graph to compact JSON, chunk by chunk,
+        for rendering on the client side.
+
+        Nodes are listed once and referenced by position in edges,
+        which are `[source, target, link_type]` triples.
+        Style keys refer to the `styles` object at the start.
+        """
+        dumps = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+        aliases = self.graph.get("aliases", {})
+        ids: dict[Word, int] = {}
+
+        yield '{"styles":'
+        yield dumps({"nodes": self.NODE_STYLES, "edges": self.EDGE_STYLES})
+        yield ',"nodes":['
+        for i, word in enumerate(self):
+            ids[word] = i
+            if isinstance(word, Group):
+                node = {
+                    "lemma": word.label,
+                    "lang": word.lang.code if word.lang else "",
+                    "language": word.lang.name if word.lang else "",
+                    "translit": "",
+                    "meaning": ", ".join(word.lemmas),
+                    "url": "",
+                    "styles": ["group"],
+                }
+                yield ("," if i else "") + dumps(node)
+                continue
+            shown = aliases.get(word, word)
+            styles = []
+            if 0 in (word.level, shown.level):  # a start word may be merged
+                styles.append("start")
+            if not word:
+                styles.append("invalid")
+            if word.frontier:
+                styles.append("frontier")
+            node = {
+                "lemma": shown.shown_lemma,
+                "lang": shown.shown_lang.code,
+                "language": shown.shown_lang.name,
+                "translit": shown.translit,
+                "meaning": shown.meaning or "",
+                "url": shown.url,
+                "styles": styles,
+            }
+            yield ("," if i else "") + dumps(node)
+        yield '],"edges":['
+        for i, (u, v, link_type) in enumerate(self.edges(data="link_type")):
+            yield ("," if i else "") + dumps([ids[u], ids[v], link_type])
+        yield "]}"
+
+    def to_json(self) -> str:
+        return "".join(self.iter_json())
+
 
 if __name__ == "__main__":
     for link_type in EtyGraph.EDGE_STYLES:
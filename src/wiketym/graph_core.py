@@ -0,0 +1,144 @@
+"""Compact graph of the words found by a query, exported to `EtyGraph` at the end."""
+from __future__ import annotations
+
+from array import array
+from typing import Iterable
+
+from .etygraph import EtyGraph
+from .helpers import load_json
+from .trace import span
+from .word import Word
+
+
+class GraphCore:
+    """
+    Directed acyclic graph of words interned to integer ids,
+    with the links of each word stored as arrays of ids and of link type codes.
+
+    Node and edge attributes are only made when exporting to an `EtyGraph`,
+    and only for the words exported.
+    """
+
+    LINK_TYPES: list[str] = list(load_json("src/wiketym/data/link_types.json"))
+    """Link types, by code."""
+    CODES: dict[str, int] = {link_type: i for i, link_type in enumerate(LINK_TYPES)}
+
+    def __init__(self) -> None:
+        self.words: list[Word] = []
+        """Words, by id."""
+        self.ids: dict[Word, int] = {}
+        """Ids, by word."""
+        self._succ: list[array] = []
+        """Ids of the words linked to, by id of the linking word."""
+        self._types: list[array] = []
+        """Link type codes, parallel to `_succ`."""
+        self._pred: tuple[array, array] | None = None
+        """Linking words in compressed sparse rows, built when needed."""
+        self.edges = 0
+        """Number of links."""
+
+    def add(self, word: Word) -> int:
+        """Id of `word`, added if new."""
+        if (id_ := self.ids.get(word)) is None:
+            id_ = self.ids[word] = len(self.words)
+            self.words.append(word)
+            self._succ.append(array("i"))
+            self._types.append(array("B"))
+            self._pred = None
+        return id_
+
+    def link(self, from_word: Word, to_word: Word, link_type: str) -> bool:
+        """
+        Link `from_word` to `to_word`, or change the type of their link.
+        Return whether they are linked, which they are not if it made a cycle.
+        """
+        u, v = self.add(from_word), self.add(to_word)
+        code = self.CODES[link_type]
+        try:
+            self._types[u][self._succ[u].index(v)] = code
+            return True
+        except ValueError:
+            pass
+        with span("cycle check", edges=self.edges):
+            if u == v or self._reaches(v, u):
+                return False
+        self._succ[u].append(v)
+        self._types[u].append(code)
+        self.edges += 1
+        self._pred = None
+        return True
+
+    def _reaches(self, start: int, goal: int) -> bool:
+        """Whether links lead from the word with id `start` to that with id `goal`."""
+        seen = {start}
+        stack = [start]
+        while stack:
+            for v in self._succ[stack.pop()]:
+                if v == goal:
+                    return True
+                if v not in seen:
+                    seen.add(v)
+                    stack.append(v)
+        return False
+
+    def _predecessors(self) -> tuple[array, array]:
+        """Offsets by id, into the ids of the words linking to each word."""
+        if self._pred is None:
+            offsets = array("i", bytes(4 * (len(self.words) + 1)))
+            for succ in self._succ:
+                for v in succ:
+                    offsets[v + 1] += 1
+            for i in range(len(self.words)):
+                offsets[i + 1] += offsets[i]
+            pred = array("i", bytes(4 * self.edges))
+            filled = array("i", offsets)
+            for u, succ in enumerate(self._succ):
+                for v in succ:
+                    pred[filled[v]] = u
+                    filled[v] += 1
+            self._pred = offsets, pred
+        return self._pred
+
+    def reachable(self, ids: Iterable[int], reverse: bool = False) -> set[int]:
+        """
+        Ids of the words reached from those with `ids` (included),
+        following links forwards, or backwards if `reverse`.
+        """
+        if reverse:
+            offsets, pred = self._predecessors()
+        seen = set(ids)
+        stack = list(seen)
+        while stack:
+            u = stack.pop()
+            for v in pred[offsets[u] : offsets[u + 1]] if reverse else self._succ[u]:
+                if v not in seen:
+                    seen.add(v)
+                    stack.append(v)
+        return seen
+
+    def to_graph(self, ids: Iterable[int] | None = None) -> EtyGraph:
+        """
+        `EtyGraph` of the words with `ids` (by default all of them)
+        and of the links between them, with the attributes to render them.
+        """
+        kept = range(len(self.words)) if ids is None else sorted(ids)
+        graph = EtyGraph()
+        graph.add_nodes_from((self.words[u], self.words[u].node) for u in kept)
+        styles = EtyGraph.EDGE_STYLES
+        for u in kept:
+            for v, code in zip(self._succ[u], self._types[u]):
+                if ids is None or self.words[v] in graph:
+                    link_type = self.LINK_TYPES[code]
+                    graph.add_edge(
+                        self.words[u],
+                        self.words[v],
+                        link_type=link_type,
+                        **styles.get(link_type, {}),
+                    )
+        return graph
+
+    def __contains__(self, word: Word) -> bool:
+        return word in self.ids
+
+    def __len__(self) -> int:
+        return len(self.words)
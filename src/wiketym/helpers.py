@@ -4,6 +4,7 @@ Utilities.
 
 import unicodedata
 import json
+from functools import lru_cache
 from typing import Any, Iterable, Iterator, Type
 import en_core_web_md
 
@@ -18,6 +19,25 @@ def nlp(text):
     return model(remove_stopwords(text))
 
 
+@lru_cache(maxsize=65536)
+def strip_accents(text: str, lang_name: str = "") -> str:
+    """
+    Remove the diacritics of `text`, except in Ancient Greek,
+    where only macrons and breves are removed.
+    """
+    nfkd_form = unicodedata.normalize("NFKD", text)
+    if lang_name != "Ancient Greek":
+        text = "".join(c for c in nfkd_form if not unicodedata.combining(c))
+    else:
+        text = "".join(
+            c
+            for c in nfkd_form
+            if unicodedata.name(c, "") not in {"COMBINING MACRON", "COMBINING BREVE"}
+        )
+    # Normalise back to ensure equality
+    return unicodedata.normalize("NFKC", text)
+
+
 def load_json(path: str) -> dict:
     """Convenience function to load a dict from a JSON file by path."""
     try:
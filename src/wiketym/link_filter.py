@@ -0,0 +1,54 @@
+"""Filters on etymological links, checked before their words are resolved."""
+from __future__ import annotations
+
+from typing import Iterable
+
+from .wiktionary import Language
+
+
+class LinkFilter:
+    """
+    Which links to follow, judged from the link type and the language code
+    of a term alone, so that rejected terms never become `Word`s
+    and their pages are never fetched.
+    """
+
+    SAME_WORD = {"redirects_to", "inflection_of"}
+    """
+    Link types to another form of the same word, in the same language,
+    which are filtered by link type only.
+    """
+
+    def __init__(
+        self,
+        link_types: Iterable[str] | None = None,
+        languages: Iterable[str] | None = None,
+        reconstructed: bool | None = None,
+    ) -> None:
+        self.link_types = None if link_types is None else set(link_types)
+        """Link types to follow, or all of them if `None`."""
+        self.languages = None if languages is None else set(languages)
+        """
+        Codes of the languages or families to follow, or all of them if `None`.
+        A family code (e.g. `gem`) also stands for the codes it prefixes
+        (e.g. `gem-pro`).
+        """
+        self.reconstructed = reconstructed
+        """Whether to follow only reconstructed or only attested terms, if set."""
+
+    def accepts(self, link_type: str, lang_code: str) -> bool:
+        """Whether to follow a link of `link_type` to a term in `lang_code`."""
+        lang_code = lang_code or ""
+        if self.link_types is not None and link_type not in self.link_types:
+            return False
+        if link_type in self.SAME_WORD:
+            return True
+        if self.languages is not None:
+            if not {lang_code, lang_code.split("-")[0]} & self.languages:
+                return False
+        if self.reconstructed is not None:
+            if lang_code not in Language.lang_data:
+                return False
+            if bool(Language(lang_code).pro) != self.reconstructed:
+                return False
+        return True
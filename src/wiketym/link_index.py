@@ -0,0 +1,99 @@
+"""Reverse index of etymological links, to find descendants."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from functools import lru_cache
+from typing import Iterable
+
+from .helpers import strip_accents
+from .wiktionary import Language, Page, Template
+from .wiktionary.api import API
+
+Key = tuple[str, str]
+"""Lemma and language code of a word."""
+
+
+@lru_cache(maxsize=65536)
+def canonical(lemma: str, lang_code: str) -> Key:
+    """
+    Key of the Wiktionary entry that `lemma` in `lang_code` stands for.
+
+    Language codes sharing a page name map to the first code with that name,
+    accents are stripped for languages that strip them in page titles
+    and reconstructed lemmas always start with `*`.
+    """
+    if lang_code not in Language.lang_data:
+        return lemma, lang_code
+    lang = Language(lang_code)
+    lang_code = Language.codes.get(lang.page_name, lang_code)
+    lang = Language(lang_code)
+    if lemma.startswith("Reconstruction:"):
+        lemma = "*" + lemma.split("/", maxsplit=1)[-1]
+    elif lang.pro and lemma and not lemma.startswith("*"):
+        lemma = "*" + lemma
+    if lang.diacr:
+        lemma = strip_accents(lemma, lang.page_name)
+    return lemma, lang_code
+
+
+class LinkIndex:
+    """
+    Reverse adjacency of `Word.links`:
+    which words link to a given word, and with which link type.
+    """
+
+    def __init__(self) -> None:
+        self._index: defaultdict[Key, defaultdict[str, dict[Key, None]]] = defaultdict(
+            lambda: defaultdict(dict)
+        )
+        """Linking words by link type (as ordered sets), by linked word."""
+        self._targets: defaultdict[Key, set[tuple[Key, str]]] = defaultdict(set)
+        """Linked words with the link type, by linking word."""
+        self.pages: defaultdict[str, set[Key]] = defaultdict(set)
+        """Linking words indexed by `build`, by title of their page."""
+        self.built = False
+        """Whether the cached pages have been indexed."""
+
+    def add(self, target: Key, link_type: str, source: Key) -> None:
+        """Record that `source` links to `target` with `link_type`."""
+        self._index[target][link_type][source] = None
+        self._targets[source].add((target, link_type))
+
+    def discard(self, source: Key) -> None:
+        """Forget the links from `source`, e.g. once its page has changed."""
+        for target, link_type in self._targets.pop(source, ()):
+            self._index[target][link_type].pop(source, None)
+
+    def referrers(self, lemma: str, lang_code: str) -> dict[str, Iterable[Key]]:
+        """Words linking to the given one, by link type."""
+        return self._index.get((lemma, lang_code), {})
+
+    def build(self, titles: Iterable[str] | None = None) -> None:
+        """
+        Index the etymologies of the given pages,
+        by default of all the pages already in the API cache.
+
+        Only cached wikitext is read, so this never calls the API.
+        """
+        if titles is None:
+            titles = {key.split("#")[0] for key in API._cache}
+        for title in titles:
+            page = Page(title)
+            for lang_section in page:
+                if not API.is_cached(title, lang_section.index):
+                    continue
+                if (lang_code := Language.codes.get(lang_section.line)) is None:
+                    continue
+                source = canonical(title, lang_code)
+                self.pages[title].add(source)
+                for section in lang_section.filter(
+                    line=lambda x: x.startswith("Etymology")
+                ):
+                    for link_type, term in Template.links(section.strict_wikitext):
+                        target = canonical(term.lemma, term.lang_code)
+                        self.add(target, link_type, source)
+        self.built = True
+
+    def __len__(self) -> int:
+        return len(self._index)
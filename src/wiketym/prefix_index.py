@@ -0,0 +1,198 @@
+"""Prefix search over language names and cached page titles."""
+
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left, insort
+from typing import Hashable, Iterable
+
+from .helpers import strip_accents
+from .wiktionary import Language
+from .wiktionary.api import API
+
+
+def normalize(text: str) -> str:
+    """Search form of `text`: case and accents are ignored."""
+    return strip_accents(text).casefold()
+
+
+class PrefixIndex:
+    """
+    Sorted array of search keys, looked up with `bisect`:
+    all the keys starting with a prefix are next to each other.
+    """
+
+    SCAN = 20
+    """Keys scanned per result, among which the shortest ones are returned."""
+    IN_PLACE = 100
+    """Most entries added or dropped at once in place, rather than sorted in."""
+
+    def __init__(self, entries: Iterable[tuple[str, Hashable]] = ()) -> None:
+        self._entries: list[tuple[str, Hashable]] = []
+        """Normalized keys with their values, in order."""
+        self.extend(entries)
+
+    def extend(
+        self,
+        entries: Iterable[tuple[str, Hashable]],
+        discard: Iterable[tuple[str, Hashable]] = (),
+    ) -> None:
+        """
+        Add entries and drop those in `discard`. A few are inserted or deleted
+        in place, each in one step; more are sorted in at once (cheap for
+        a sorted array) and the new array swapped in. Either way, searches
+        never see the array half sorted.
+        """
+        added = [(normalize(key), value) for key, value in entries]
+        dropped = {(normalize(key), value) for key, value in discard}
+        if len(added) + len(dropped) <= self.IN_PLACE:
+            for entry in dropped:
+                i = bisect_left(self._entries, entry)
+                if i < len(self._entries) and self._entries[i] == entry:
+                    del self._entries[i]
+            for entry in added:
+                insort(self._entries, entry)
+            return
+        kept = self._entries
+        if dropped:
+            kept = [entry for entry in kept if entry not in dropped]
+        kept = kept + added
+        kept.sort()
+        self._entries = kept
+
+    def search(self, prefix: str, limit: int = 10) -> list[Hashable]:
+        """
+        Distinct values of at most `limit` keys starting with `prefix`,
+        the shortest keys first (the closest to the prefix).
+        """
+        prefix = normalize(prefix)
+        start = bisect_left(self._entries, (prefix,))
+        matches: dict[Hashable, str] = {}
+        for key, value in self._entries[start : start + limit * self.SCAN]:
+            if not key.startswith(prefix):
+                break
+            matches.setdefault(value, key)
+        ranked = sorted(
+            matches, key=lambda value: (len(matches[value]), matches[value])
+        )
+        return ranked[:limit]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LanguageIndex(PrefixIndex):
+    """
+    Languages by code and by name, then by any later word of their name
+    (e.g. `Old English` for `english`).
+    """
+
+    def __init__(self) -> None:
+        super().__init__(
+            (key, code)
+            for code, data in Language.lang_data.items()
+            for key in (code, data["name"])
+        )
+        self._words = PrefixIndex(
+            (" ".join(words[i:]), code)
+            for code, data in Language.lang_data.items()
+            for words in [data["name"].replace("-", " ").split()]
+            for i in range(1, len(words))
+        )
+        """Languages by the end of their name, from each word after the first."""
+
+    def search(self, prefix: str, limit: int = 10) -> list[str]:
+        codes = super().search(prefix, limit)
+        for code in self._words.search(prefix, limit):
+            if len(codes) >= limit:
+                break
+            if code not in codes:
+                codes.append(code)
+        return codes
+
+
+class LemmaIndex(PrefixIndex):
+    """
+    Lemmas of the cached pages, by language code (if given) and lemma.
+
+    `build` indexes the pages in the API cache (see `warm.warm_up`).
+    The index then hears of the responses stored or deleted since,
+    and applies them at the next lookup.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._keys: dict[str, list[tuple[str, tuple[str, str]]]] = {}
+        """Entries indexed from each API cache key."""
+        self._pending: dict[str, list[tuple[str, tuple[str, str]]]] = {}
+        """Entries of the keys stored or deleted (none) since the last update."""
+        self._lock = threading.Lock()
+        self.built = False
+        """Whether the cached pages have been indexed."""
+
+    def build(self) -> None:
+        """
+        Index the pages in the API cache, reading each of their responses
+        once, then follow the cache. Meant to run once, before any lookup.
+        """
+        with self._lock:
+            if self.built:
+                return
+            API._cache.listeners.append(self._changed)
+            keys = [key for key in API._cache if self._indexes(key)]
+            for key, response in API._cache.stored(keys):
+                if response is not None:
+                    self._keys[key] = list(self._entries_of(key, response))
+            self.extend(entry for entries in self._keys.values() for entry in entries)
+            self.built = True
+
+    def _changed(self, key: str, response: dict | None) -> None:
+        """Note the response stored (or deleted) under `key`, for `update`."""
+        if self._indexes(key):
+            entries = list(self._entries_of(key, response)) if response else []
+            with self._lock:
+                self._pending[key] = entries
+
+    def update(self) -> None:
+        """Index the pages cached or deleted since the last update."""
+        if not self.built:
+            self.build()
+        if not self._pending:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            discard = [e for key in pending for e in self._keys.pop(key, ())]
+            for key, entries in pending.items():
+                if entries:
+                    self._keys[key] = entries
+            self.extend((e for entries in pending.values() for e in entries), discard)
+
+    @staticmethod
+    def _indexes(key: str) -> bool:
+        """Whether the response under an API cache key lists page sections."""
+        return key.partition("#")[2] in ("", "sections")
+
+    @staticmethod
+    def _entries_of(key: str, response: dict) -> Iterable[tuple[str, tuple[str, str]]]:
+        lemma = key.partition("#")[0]
+        if lemma.startswith("Reconstruction:"):
+            lemma = "*" + lemma.split("/", maxsplit=1)[-1]
+        for section in response.get("parse", {}).get("sections", []):
+            if section["toclevel"] == 1:
+                if lang_code := Language.codes.get(section["line"]):
+                    yield f"{lang_code} {lemma.lstrip('*')}", (lemma, lang_code)
+                    yield f" {lemma.lstrip('*')}", (lemma, lang_code)
+
+    def lemmas(
+        self, prefix: str, lang_code: str = "", limit: int = 10
+    ) -> list[tuple[str, str]]:
+        """
+        Cached lemmas with their language code, starting with `prefix`
+        (ignoring `*`), in `lang_code` or in any language.
+        """
+        self.update()
+        return self.search(f"{lang_code} {prefix.lstrip('*')}", limit)
+
+
+lemma_index = LemmaIndex()
+"""Lemmas of the cached pages, for the search endpoint."""
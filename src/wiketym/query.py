@@ -1,6 +1,15 @@
-from .helpers import load_json, dump_json
+import heapq
+import threading
+import time
+from collections import Counter
+from itertools import count
+
+from .helpers import load_json
+from .link_filter import LinkFilter
+from .trace import span
 from .word import Word
 from .etygraph import EtyGraph
+from .graph_core import GraphCore
 from .wiktionary.api import API
 from werkzeug.utils import secure_filename
 
@@ -8,6 +17,26 @@ from werkzeug.utils import secure_filename
 class Query:
     ALL_LINKS = load_json("src/wiketym/data/link_types.json").keys()
 
+    LINK_RANKS = {
+        "redirects_to": 0,
+        "inflection_of": 0,
+        "inherited_from": 0,
+        "borrowed_from": 1,
+        "derived_from": 2,
+        "internally_from": 2,
+        "etymologycal_root": 2,
+        "mentioned": 3,
+        "linked": 3,
+    }
+    """Expansion priority of the words reached through each link type."""
+
+    WEAK_LINKS = EtyGraph.WEAK_LINKS
+
+    BUDGETS = {"max_level", "max_count", "max_count_weak"}
+    """Options which may only grow when resuming a query."""
+    LIMITS = {"max_fetches", "max_nodes", "deadline"}
+    """Options which may change freely when resuming a query."""
+
     def __init__(
         self,
         start_words: set[Word] = [],
@@ -20,6 +49,15 @@ class Query:
         ignore_affixes: bool = True,
         merge: bool = True,
         disambiguate: bool = True,
+        direction: str = "up",
+        max_fetches: int | None = None,
+        max_nodes: int | None = None,
+        deadline: float | None = None,
+        render: bool = True,
+        languages: set[str] | None = None,
+        reconstructed: bool | None = None,
+        connect: bool = False,
+        summarize: int | None = None,
     ) -> None:
         self.start_words: str[Word] = start_words
         """Words for the current query."""
@@ -27,69 +65,309 @@ class Query:
         """Allowed links to be considered."""
         self.max_level = max_level
         """Maximum distance from source words to consider."""
+        self.allow_invalid = allow_invalid
+        self.max_count = max_count
+        """Maximum number of links followed from each word."""
+        self.max_count_weak = max_count_weak
+        """Maximum number of weak links followed from each word."""
+        self.reduce = reduce
+        self.ignore_affixes = ignore_affixes
+        self.merge = merge
+        self.disambiguate = disambiguate
+        self.direction = direction
+        """
+        Either `up` towards ancestors, or `down` towards descendants,
+        found in `Word.index` (built beforehand, see `warm.warm_up`).
+        """
+        self.max_fetches = max_fetches
+        """Maximum number of pages requested from the API."""
+        self.max_nodes = max_nodes
+        """Maximum number of words in the graph."""
+        self.deadline = deadline
+        """Maximum number of seconds spent expanding the graph."""
+        self.summarize = summarize
+        """Number of words beyond which the resulting graph is summarized, if any."""
+        self.link_filter = LinkFilter(allowed_links, languages, reconstructed)
+        """
+        Links to follow, by type, by language or family of the related word
+        (`languages`) and by whether it is `reconstructed`.
+        """
+        self.connect = connect and len(start_words) > 1
+        """
+        Whether to only look for the words connecting the start words,
+        expanding them level by level and stopping as soon as they all meet.
+        """
+
+        self.raw = GraphCore()
+        """All words and links found, before merging and reducing."""
         self.G = EtyGraph()
         """Graph resulted from the query."""
         self.handled_words: set[Word] = set()
+        self.related_counts: dict[Word, int] = {}
+        """Number of links followed from each handled word."""
+        self.truncated: set[Word] = set()
+        """Handled words with more links than `max_count(_weak)` allowed."""
+        self.partial: set[Word] = set()
+        """Words whose expansion was interrupted by a budget."""
+        self.frontier: set[Word] = set()
+        """Words whose expansion was cut short by a budget."""
+        self.exhausted: str | None = None
+        """Name of the budget which ran out, if any."""
+        self.words: dict[tuple[str, str], Word] = {}
+        """Words known to this query, restored when resuming it."""
+        self._queue: list[tuple[int, int, int, Word]] = []
+        self._deferred: list[tuple[int, int, int, Word]] = []
+        """Queued words which were beyond `max_level`."""
+        self._order = count()
+        self._origin: dict[Word, Word] = {}
+        """Start word from which each word was first reached."""
+        self._groups: dict[Word, Word] = {}
+        """Start words already connected, as a union-find forest."""
+        self.lock = threading.Lock()
+        """Lock for callers to hold while resuming this query, one at a time."""
 
         for word in start_words:
             word.level = 0
-            self.G.add(word)
-
-        future_words = start_words
-        level = 0  # will be incremented
-        while (current_words := future_words) and ((level := level + 1) <= max_level):
-            future_words = set()
-            for current_word in current_words:
-                related_count = 0
-                for link_type, related_words in current_word.links.items():
-                    if related_count >= max_count:
-                        break
-                    if link_type in {"mentioned", "linked"} and related_count:
-                        break
-                    for related_word in related_words:
-                        if current_word.lang.pro and not related_word.lang.pro:
-                            if link_type in {"mentioned", "linked"}:
-                                continue
-                        if ignore_affixes:
-                            wk = current_word.entry.wikitext
-                            if "==Suffix==" in wk or "==Prefix==" in wk:
-                                break
-                        if related_count >= max_count or (
-                            link_type in {"mentioned", "linked"}
-                            and related_count >= max_count_weak
-                        ):
-                            break
-                        if allow_invalid or related_word:
-                            related_count += 1
-                            if related_word not in self.handled_words | future_words:
-                                # print(
-                                #     "added",
-                                #     related_word,
-                                #     "to",
-                                #     current_word,
-                                #     related_count,
-                                # )
-                                if disambiguate:
-                                    # print("DISAMBIIIIIIIIIIII")
-                                    related_word.disambiguate(current_word)
-                                future_words.add(related_word)
-                                self.G.add(related_word)
-                            self.G.link(related_word, current_word, link_type)
-                self.handled_words.add(current_word)
-
-        if merge:
-            self.G.merge()
-
-        if reduce:
-            self.G.reduce().render(self.filename)
-        else:
-            self.G.render(self.filename)
-        dump_json("src/wiketym/data/cache.json", API._cache)
-        Word.__new__.cache_clear()
+            self.raw.add(word)
+            self._origin[word] = self._groups[word] = word
+            self._push(0, 0, word)
+
+        self.run(render)
+
+    def relaxes(self, **options) -> bool:
+        """
+        Whether `options` grow a budget or relax a limit of this query
+        (`None` being no limit), so that resuming it may expand it further.
+        """
+        return any(
+            (current := getattr(self, name)) is not None
+            and (value is None or value > current)
+            for name, value in options.items()
+        )
+
+    def resume(self, render: bool = True, **options) -> "Query":
+        """
+        Continue this query with larger budgets or other limits, expanding only
+        the words and links which the previous budgets left out,
+        then render the resulting graph to PDF if `render`.
+
+        The resulting graph is the same as that of a new query
+        with the same options.
+        """
+        if unknown := options.keys() - self.BUDGETS - self.LIMITS:
+            raise ValueError(f"{min(unknown)} cannot change when resuming a query")
+        for name, value in options.items():
+            if name in self.BUDGETS and value < getattr(self, name):
+                raise ValueError(f"{name} can only grow when resuming a query")
+        grown = {
+            name
+            for name, value in options.items()
+            if name in self.BUDGETS and value > getattr(self, name)
+        }
+        for name, value in options.items():
+            setattr(self, name, value)
+
+        Word._instances.update(self.words)
+        if "max_level" in grown:
+            for item in self._deferred:
+                heapq.heappush(self._queue, item)
+            self._deferred.clear()
+        requeue = set(self.partial)
+        if grown & {"max_count", "max_count_weak"}:
+            requeue |= self.truncated
+        for word in requeue:
+            self._push(0, word.level, word)
+        self.partial.clear()
+        self.exhausted = None
+        for word in self.frontier:
+            word.frontier = False
+
+        self.run(render)
+        return self
+
+    def run(self, render: bool = True) -> None:
+        """
+        Expand the graph, then merge, reduce and summarize it,
+        and render it to PDF if `render`.
+        """
+        self._start = time.monotonic()
+        self._fetches = API.stats["misses"]
+        self.expand()
+
+        self.G = self.connecting() if self.connect else self.raw.to_graph()
+        if self.merge:
+            with span("merge", nodes=len(self.G)):
+                self.G.merge()
+        if self.reduce:
+            with span("reduce", nodes=len(self.G)):
+                self.G = self.G.reduce()
+        if self.summarize and len(self.G) > self.summarize:
+            with span("summarize", nodes=len(self.G)):
+                self.G = self.G.summarize(self.summarize)
+        if render:
+            with span("render", nodes=len(self.G)):
+                self.G.render(self.filename)
+        self.words = dict(Word._instances)
+        Word.clear()
         for word in self.handled_words:
-            del word.links
+            word.__dict__.pop("terms", None)
             del word
 
+    def _push(self, rank: int, level: int, word: Word) -> None:
+        priority = (level, rank) if self.connect else rank
+        heapq.heappush(self._queue, (priority, level, next(self._order), word))
+
+    def expand(self) -> None:
+        """
+        Expand the graph best-first from the queued words,
+        following strong links and shallow words first.
+
+        A word reached again through a shorter path is queued again at its new
+        level, so that `max_level` bounds the distance from the start words.
+
+        When a budget runs out, the words left unexpanded
+        (or expanded only partially) are marked as the frontier.
+        """
+        while self._queue:
+            if self._budget_exhausted() or self.connected:
+                break
+            item = heapq.heappop(self._queue)
+            _, level, _, current_word = item
+            if level > current_word.level:
+                continue  # queued again since, closer to the start words
+            if level >= self.max_level:
+                self._deferred.append(item)
+                continue
+            with span("expand", word=repr(current_word), level=level):
+                for related_word, link_type in self._expand_word(current_word):
+                    related_word.level = level + 1
+                    rank = self.LINK_RANKS.get(link_type, len(self.LINK_RANKS))
+                    self._push(rank, level + 1, related_word)
+            self.handled_words.add(current_word)
+
+        if self.connected:
+            return
+        self.frontier = set(self.partial)
+        for _, level, _, word in self._queue:
+            if level == word.level < self.max_level:
+                self.frontier.add(word)
+        for word in self.frontier:
+            word.frontier = True
+
+    def _expand_word(self, current_word: Word):
+        """
+        Link `current_word` to its related words within the per-word limits.
+
+        Yield the related words which are new to the graph,
+        or closer to the start words than known so far, with their link type.
+        """
+        related_count = 0
+        self.truncated.discard(current_word)
+        for link_type, related_words in self.related(current_word).items():
+            if related_count >= self.max_count:
+                if related_words:
+                    self.truncated.add(current_word)
+                break
+            if link_type in self.WEAK_LINKS and related_count:
+                break
+            for related_word in related_words:
+                if current_word.lang.pro and not related_word.lang.pro:
+                    if link_type in self.WEAK_LINKS:
+                        continue
+                if self.ignore_affixes:
+                    wk = current_word.entry.wikitext
+                    if "==Suffix==" in wk or "==Prefix==" in wk:
+                        break
+                if related_count >= self.max_count or (
+                    link_type in self.WEAK_LINKS
+                    and related_count >= self.max_count_weak
+                ):
+                    self.truncated.add(current_word)
+                    break
+                if self._budget_exhausted() or (
+                    related_word not in self.raw
+                    and self.max_nodes is not None
+                    and len(self.raw) >= self.max_nodes
+                ):
+                    self.exhausted = self.exhausted or "max_nodes"
+                    self.partial.add(current_word)
+                    return
+                if self.direction == "up":
+                    if not current_word.valid_ascendant(related_word):
+                        continue
+                if self.allow_invalid or related_word:
+                    related_count += 1
+                    self.related_counts[current_word] = related_count
+                    if related_word not in self.raw:
+                        if self.disambiguate:
+                            with span("disambiguate", word=repr(related_word)):
+                                related_word.disambiguate(current_word)
+                        self.raw.add(related_word)
+                        yield related_word, link_type
+                    elif related_word.level > current_word.level + 1:
+                        yield related_word, link_type
+                    if self.direction == "down":
+                        self.raw.link(current_word, related_word, link_type)
+                    else:
+                        self.raw.link(related_word, current_word, link_type)
+                    if self.connect:
+                        self._meet(current_word, related_word)
+
+    def _find(self, word: Word) -> Word:
+        while self._groups[word] is not word:
+            word = self._groups[word] = self._groups[self._groups[word]]
+        return word
+
+    def _meet(self, word: Word, related_word: Word) -> None:
+        """Connect the start words from which `word` and `related_word` were reached."""
+        origin = self._origin[word]
+        other = self._origin.setdefault(related_word, origin)
+        self._groups[self._find(other)] = self._find(origin)
+
+    @property
+    def connected(self) -> bool:
+        """Whether all the start words are connected, in connect mode."""
+        return self.connect and len({self._find(w) for w in self.start_words}) == 1
+
+    def connecting(self) -> EtyGraph:
+        """
+        Subgraph of the words on the paths from the start words
+        to the words where at least two of them meet,
+        or the whole graph if none of them met.
+        """
+        up = self.direction == "up"
+        starts = [self.raw.ids[word] for word in self.start_words]
+        reached = [self.raw.reachable([start], reverse=up) for start in starts]
+        counts = Counter(id_ for ids in reached for id_ in ids)
+        meeting = {id_ for id_, n in counts.items() if n > 1}
+        if not meeting:
+            return self.raw.to_graph()
+        kept = counts.keys() & self.raw.reachable(meeting, reverse=not up)
+        return self.raw.to_graph(kept | set(starts))
+
+    def _budget_exhausted(self) -> bool:
+        """Check the fetch and time budgets, recording which one ran out."""
+        if self.exhausted:
+            return True
+        if self.max_fetches is not None:
+            if API.stats["misses"] - self._fetches >= self.max_fetches:
+                self.exhausted = "max_fetches"
+        if self.deadline is not None:
+            if time.monotonic() - self._start >= self.deadline:
+                self.exhausted = "deadline"
+        return self.exhausted is not None
+
+    def related(self, word: Word) -> dict[str, list[Word]]:
+        """Words to expand to from `word`, by link type."""
+        if self.direction == "up":
+            return word.related(self.link_filter)
+        return word.descendants(self.link_filter)
+
+    @property
+    def size(self) -> int:
+        """Number of words found, as a measure of the memory held."""
+        return len(self.raw)
+
     @property
     def filename(self):
         return (
@@ -0,0 +1,168 @@
+"""
+Refresh of the API cache: only the pages edited since they were fetched
+are fetched again, and what was parsed from them is forgotten.
+
+Edited pages are found by asking for the latest revision of every cached page,
+or from the recent changes of the last hours (Wiktionary keeps 30 days of them):
+
+    python -m src.wiketym.refresh --rate 1
+    python -m src.wiketym.refresh --hours 24
+
+Running workers forget what they parsed from the refreshed pages
+at their next query, through `sync`.
+"""
+from __future__ import annotations
+
+import argparse
+import calendar
+import time
+from collections import defaultdict
+from typing import Iterable
+
+from .link_index import Key, canonical
+from .word import Word
+from .wiktionary import Language, Page
+from .wiktionary.api import API
+
+BATCH = 50
+"""Titles per revision request, the most the API allows to anonymous users."""
+
+
+def cached_keys() -> defaultdict[str, list[str]]:
+    """Keys of the cached responses, by page title."""
+    keys = defaultdict(list)
+    for key in API._cache:
+        keys[key.partition("#")[0]].append(key)
+    return keys
+
+
+def latest_revisions(titles: Iterable[str]) -> dict[str, int | None]:
+    """Latest revision id of each page, `None` for missing pages."""
+    titles = list(titles)
+    revisions = {}
+    for start in range(0, len(titles), BATCH):
+        batch = titles[start : start + BATCH]
+        reply = API.query(prop="revisions", rvprop="ids", titles="|".join(batch))
+        query = reply.get("query", {})
+        aliases = {alias["to"]: alias["from"] for alias in query.get("normalized", [])}
+        for page in query.get("pages", []):
+            title = aliases.get(page["title"], page["title"])
+            revisions[title] = page.get("revisions", [{}])[0].get("revid")
+    return revisions
+
+
+def recent_changes(since: float) -> dict[str, int]:
+    """Time of the latest edit of each page edited since `since` (Unix time)."""
+    params = {
+        "list": "recentchanges",
+        "rcprop": "title|timestamp",
+        "rcnamespace": "0|118",  # main and Reconstruction
+        "rcend": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(since)),
+        "rclimit": 500,
+    }
+    edited = {}
+    while True:
+        reply = API.query(**params)
+        for change in reply.get("query", {}).get("recentchanges", []):
+            edit_time = time.strptime(change["timestamp"], "%Y-%m-%dT%H:%M:%SZ")
+            edited.setdefault(change["title"], calendar.timegm(edit_time))
+        if "continue" not in reply:
+            return edited
+        params |= reply["continue"]
+
+
+def stale(since: float | None = None) -> list[str]:
+    """
+    Titles of the cached pages edited after they were fetched, found through
+    the recent changes since `since` (Unix time) if given,
+    otherwise through the latest revisions of all the cached pages.
+
+    Responses cached without revision id or fetch time are taken as stale,
+    as are those fetched in the second of an edit (timestamps are in seconds).
+    """
+    keys = cached_keys()
+    if since is not None:
+        return [
+            title
+            for title, edit_time in recent_changes(since).items()
+            if title in keys
+            and any(
+                API._cache[key].get("fetched", 0) <= edit_time for key in keys[title]
+            )
+        ]
+    latest = latest_revisions(keys)
+    return [
+        title
+        for title, revid in latest.items()
+        if any(
+            API._cache[key].get("parse", {}).get("revid") != revid
+            for key in keys[title]
+        )
+    ]
+
+
+def sources(title: str) -> set[Key]:
+    """Words of the cached language sections of a page."""
+    keys = set()
+    for key in (title, f"{title}#sections"):
+        for section in API._cache.get(key, {}).get("parse", {}).get("sections", []):
+            if section["toclevel"] == 1:
+                if lang_code := Language.codes.get(section["line"]):
+                    keys.add(canonical(title, lang_code))
+    return keys
+
+
+def refresh(titles: Iterable[str]) -> int:
+    """
+    Fetch again the cached responses about the pages with `titles`,
+    and forget the pages, words and links parsed from them.
+    Return the number of API calls made.
+    """
+    keys = cached_keys()
+    fetches = 0
+    for title in titles:
+        words = sources(title)
+        for key in keys.get(title, []):
+            API._fetch(key)
+            fetches += 1
+        forget(title, words)
+    return fetches
+
+
+def forget(title: str, words: Iterable[Key] = ()) -> None:
+    """
+    Forget the page with `title`, and the words and links parsed from it:
+    from its language sections cached or indexed, or from those in `words`.
+    """
+    Page.registry.discard(title)
+    for key in set(words) | sources(title) | Word.index.pages.pop(title, set()):
+        Word.index.discard(key)
+        Word._instances.pop(key, None)
+    if Word.index.built:
+        Word.index.build([title])
+
+
+def sync() -> list[str]:
+    """
+    Forget what this process parsed from the pages whose responses
+    another process (e.g. the refresh job) stored again since the last call.
+    Return the titles of these pages.
+    """
+    titles = {key.partition("#")[0] for key in API._cache.updates()}
+    titles = sorted(t for t in titles if t in Page.registry or t in Word.index.pages)
+    for title in titles:
+        forget(title)
+    return titles
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hours", type=float, help="look at recent changes only")
+    parser.add_argument("--rate", type=float, default=1, help="API calls per second")
+    args = parser.parse_args()
+
+    API.min_interval = 1 / args.rate
+    since = time.time() - args.hours * 3600 if args.hours else None
+    titles = stale(since)
+    print(f"{len(titles)} of {len(cached_keys())} cached pages changed")
+    print(f"{refresh(titles)} responses fetched again")
@@ -0,0 +1,193 @@
+"""
+Rendering of graphs with graphviz, shared by all requests.
+
+The pool of render workers is per process. Gunicorn's default sync workers
+handle one request at a time, so each process renders at most one graph anyway:
+set `WIKETYM_RENDER_SLOTS` to bound the renders of all the processes of a host,
+or run threaded workers (`--threads`) for the pool itself to make a difference.
+"""
+from __future__ import annotations
+
+import fcntl
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from typing import Iterator
+
+
+class RenderError(Exception):
+    """Raised when a graph cannot be rendered in time or at all."""
+
+
+class RenderSlots:
+    """
+    Bound of `count` renders at a time across the processes of a host,
+    each holding an exclusive lock on one of as many files in `directory`.
+    Locks are released by the system when their process dies.
+    """
+
+    def __init__(self, count: int, directory: str, poll: float = 0.05) -> None:
+        self.count = count
+        self.directory = directory
+        self.poll = poll
+        """Seconds between two attempts at taking a slot."""
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def for_host(cls, count: str | None) -> RenderSlots | None:
+        """Slots in the temporary directory of the host, if a `count` is set."""
+        if not count:
+            return None
+        return cls(int(count), os.path.join(tempfile.gettempdir(), "wiketym-render"))
+
+    @contextmanager
+    def hold(self, deadline: float) -> Iterator[None]:
+        """Hold a free slot, waiting for one until `deadline` (monotonic time)."""
+        while True:
+            for i in range(self.count):
+                path = os.path.join(self.directory, f"{i}.lock")
+                fd = os.open(path, os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    os.close(fd)
+                    continue
+                try:
+                    yield
+                    return
+                finally:
+                    os.close(fd)  # releases the lock
+            if time.monotonic() >= deadline:
+                raise RenderError("Too many graphs being rendered on this host")
+            time.sleep(self.poll)
+
+
+class Renderer:
+    """
+    Bounded pool of render workers, within the `slots` of the host if given.
+
+    Every render runs `unflatten` and a layout engine as subprocesses
+    which are killed once the render has taken `timeout` seconds.
+    Big graphs skip `unflatten` and, beyond that, fall back to `sfdp`,
+    whose cost grows far slower than that of `dot`.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        timeout: float = 30,
+        max_queue: int = 16,
+        unflatten_limit: tuple[int, int] = (150, 300),
+        dot_limit: tuple[int, int] = (500, 1500),
+        slots: RenderSlots | None = None,
+    ) -> None:
+        self.workers = workers
+        """Number of renders running at the same time."""
+        self.timeout = timeout
+        """Seconds after which a render is given up, its subprocess killed."""
+        self.max_queue = max_queue
+        """Number of renders allowed to wait for a worker."""
+        self.unflatten_limit = unflatten_limit
+        """Maximum nodes and edges of a graph laid out after `unflatten`."""
+        self.dot_limit = dot_limit
+        """Maximum nodes and edges of a graph laid out with `dot`."""
+        self.slots = slots
+        self.queued = 0
+        """Number of renders waiting for a worker."""
+        self.running = 0
+        """Number of renders in progress."""
+        self.counts = {"rendered": 0, "failed": 0, "timeouts": 0, "rejected": 0}
+        self.times: deque[float] = deque(maxlen=100)
+        """Durations of the latest renders, in seconds."""
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="render")
+
+    def render(self, source: str, path: str, nodes: int, edges: int) -> str:
+        """
+        Lay out the DOT `source` of a graph with `nodes` and `edges`
+        and write it to `path` as PDF, waiting for a free worker.
+        """
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.counts["rejected"] += 1
+                raise RenderError("Too many graphs waiting to be rendered")
+            self.queued += 1
+        return self._executor.submit(self._render, source, path, nodes, edges).result()
+
+    def _render(self, source: str, path: str, nodes: int, edges: int) -> str:
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        start = time.monotonic()
+        deadline = start + self.timeout
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with self.slots.hold(deadline) if self.slots else nullcontext():
+                for command in self.commands(nodes, edges, path):
+                    source = self._run(command, source, deadline)
+            self._count("rendered")
+            return path
+        except RenderError:
+            self._count("failed")
+            raise
+        finally:
+            self.times.append(time.monotonic() - start)
+            with self._lock:
+                self.running -= 1
+
+    def commands(self, nodes: int, edges: int, path: str) -> list[list[str]]:
+        """Pipeline of graphviz commands fit for the size of the graph."""
+        if nodes > self.dot_limit[0] or edges > self.dot_limit[1]:
+            return [["sfdp", "-Goverlap=prism", "-Tpdf", "-o", path]]
+        layout = ["dot", "-Tpdf", "-o", path]
+        if nodes > self.unflatten_limit[0] or edges > self.unflatten_limit[1]:
+            return [layout]
+        return [["unflatten", "-l", "5"], layout]
+
+    def _run(self, command: list[str], source: str, deadline: float) -> str:
+        """Pipe `source` through `command`, killed at `deadline` (monotonic time)."""
+        try:
+            process = subprocess.run(
+                command,
+                input=source,
+                capture_output=True,
+                text=True,
+                timeout=max(deadline - time.monotonic(), 0),
+            )
+        except subprocess.TimeoutExpired as exc:
+            self._count("timeouts")
+            raise RenderError(f"{command[0]} timed out") from exc
+        except OSError as exc:
+            raise RenderError(f"{command[0]} could not be run: {exc}") from exc
+        if process.returncode:
+            raise RenderError(f"{command[0]} failed: {process.stderr.strip()}")
+        return process.stdout
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] += 1
+
+    def stats(self) -> dict:
+        times = sorted(self.times)
+        return {
+            "workers": self.workers,
+            "queued": self.queued,
+            "running": self.running,
+            **self.counts,
+            "time_mean": sum(times) / len(times) if times else 0,
+            "time_p95": times[int(len(times) * 0.95)] if times else 0,
+            "time_max": times[-1] if times else 0,
+        }
+
+
+renderer = Renderer(
+    workers=int(os.environ.get("WIKETYM_RENDER_WORKERS", 2)),
+    timeout=float(os.environ.get("WIKETYM_RENDER_TIMEOUT", 30)),
+    slots=RenderSlots.for_host(os.environ.get("WIKETYM_RENDER_SLOTS")),
+)
+"""Renderer shared by all graphs of this process."""
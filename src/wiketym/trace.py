@@ -0,0 +1,141 @@
+"""
+Opt-in tracing of queries, exported as Chrome trace event JSON
+(open it in Perfetto or `chrome://tracing`).
+
+Spans are only recorded while a `Tracer` is active in the current context,
+otherwise `span` costs a context variable lookup.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Iterator
+
+_tracer: ContextVar[Tracer | None] = ContextVar("tracer", default=None)
+
+
+def span(name: str, **args):
+    """
+    Context manager recording a span named `name` in the active tracer, if any.
+
+    It yields the `args` of the span, which can be updated until it ends.
+    """
+    if (tracer := _tracer.get()) is None:
+        return nullcontext(args)
+    return tracer.span(name, **args)
+
+
+class Tracer:
+    """
+    Recorder of the spans of the current context and, if `sample_interval`
+    is set, of the stacks of the current thread sampled every so many seconds.
+    """
+
+    PROFILE_TID = 0
+    """Thread id under which sampled stacks are shown."""
+
+    def __init__(self, sample_interval: float | None = None) -> None:
+        self.sample_interval = sample_interval
+        self.events: list[dict] = []
+        """Complete (`X`) trace events, with times in microseconds."""
+        self._start = time.perf_counter()
+        self._samples: list[tuple[float, list[str]]] = []
+        self._stop = threading.Event()
+
+    def _now(self) -> float:
+        return (time.perf_counter() - self._start) * 1e6
+
+    @contextmanager
+    def span(self, name: str, **args) -> Iterator[dict]:
+        start = self._now()
+        try:
+            yield args
+        finally:
+            self.events.append(
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": start,
+                    "dur": self._now() - start,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                    "args": args,
+                }
+            )
+
+    @contextmanager
+    def active(self) -> Iterator[Tracer]:
+        """Record the spans of the current context (and samples) while active."""
+        token = _tracer.set(self)
+        sampler = None
+        if self.sample_interval:
+            sampler = threading.Thread(
+                target=self._sample, args=(threading.get_ident(),), daemon=True
+            )
+            sampler.start()
+        try:
+            yield self
+        finally:
+            _tracer.reset(token)
+            if sampler:
+                self._stop.set()
+                sampler.join()
+
+    def _sample(self, thread_id: int) -> None:
+        while not self._stop.wait(self.sample_interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                name = os.path.basename(code.co_filename)
+                stack.append(f"{code.co_name} ({name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self._samples.append((self._now(), stack[::-1]))
+
+    def _profile_events(self) -> list[dict]:
+        """
+        Sampled stacks as nested spans: a frame lasts
+        from the first sample it appears in to the first one it is gone from.
+        """
+        events = []
+        opened: list[tuple[str, float]] = []
+        for ts, stack in self._samples + [(self._now(), [])]:
+            depth = 0
+            while (
+                depth < min(len(opened), len(stack))
+                and opened[depth][0] == stack[depth]
+            ):
+                depth += 1
+            for name, start in reversed(opened[depth:]):
+                events.append(
+                    {
+                        "name": name,
+                        "ph": "X",
+                        "ts": start,
+                        "dur": ts - start,
+                        "pid": os.getpid(),
+                        "tid": self.PROFILE_TID,
+                        "cat": "sample",
+                    }
+                )
+            opened = opened[:depth] + [(name, ts) for name in stack[depth:]]
+        return events
+
+    def to_json(self) -> str:
+        """The trace in the Chrome trace event format."""
+        events = self.events
+        if self._samples:
+            metadata = {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "tid": self.PROFILE_TID,
+                "args": {"name": "sampled stacks"},
+            }
+            events = [metadata] + events + self._profile_events()
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, default=str)
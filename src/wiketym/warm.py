@@ -0,0 +1,90 @@
+"""
+Warm start of the app, before gunicorn forks its workers.
+
+With `preload_app` (see `gunicorn.conf.py`), the master imports the app,
+which loads the spaCy model and the language tables, and opens the API cache.
+`warm_up` then parses the most requested pages, so that every worker
+starts with them and shares them with the master copy-on-write.
+
+With `WIKETYM_SNAPSHOT` set, `warm_up` also pickles the API responses it left
+in memory, for the next start to load them at once rather than one by one
+from the store. Take a snapshot without starting the app with:
+
+    export WIKETYM_SNAPSHOT=src/wiketym/data/cache.pickle
+    python -m src.wiketym.warm snapshot --log requests.log
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+from collections import Counter
+from typing import Iterable
+
+from .link_index import Key, canonical
+from .prefix_index import lemma_index
+from .word import Word
+from .wiktionary import Language, Page
+from .wiktionary.api import API, SNAPSHOT_PATH
+
+
+def popular(log: str, limit: int = 500) -> list[Key]:
+    """Keys of the most requested start words in a request log."""
+    counts: Counter[Key] = Counter()
+    try:
+        with open(log, encoding="utf-8") as file:
+            for line in file:
+                args = json.loads(line).get("args", {})
+                for name, lemma in args.items():
+                    if name.startswith("lemma") and lemma:
+                        lang_code = args.get("lang_code" + name[len("lemma") :])
+                        if lang_code in Language.lang_data:
+                            counts[canonical(lemma, lang_code)] += 1
+    except FileNotFoundError:
+        return []
+    return [key for key, _ in counts.most_common(limit)]
+
+
+def hot_titles(log: str, limit: int = 500) -> list[str]:
+    """Titles of the pages of the most requested words in a request log."""
+    return [Word(*key).page_title for key in popular(log, limit)]
+
+
+def warm_up(titles: Iterable[str] = ()) -> None:
+    """
+    Build the data shared by all requests, including the reverse link index
+    of the cached pages for queries of descendants and their lemma index
+    for the search endpoint, and take a snapshot
+    of the API responses in memory, if configured, then move everything
+    allocated so far out of reach of the garbage collector,
+    whose passes would otherwise copy the shared memory into each worker.
+    """
+    for code in Language.lang_data:
+        Language(code)
+    if not Word.index.built:
+        Word.index.build()
+    lemma_index.build()
+    for title in titles:
+        if title not in API._cache and f"{title}#sections" not in API._cache:
+            continue  # only warm what needs no API call
+        for lang_section in Page(title):
+            if API.is_cached(title, lang_section.index):
+                lang_section.wikitext
+                list(lang_section)
+    Word.clear()
+    if SNAPSHOT_PATH:
+        API.snapshot(SNAPSHOT_PATH)
+    gc.collect()
+    gc.freeze()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=["snapshot"])
+    parser.add_argument("--log", help="request log to find the hot pages in")
+    parser.add_argument("--hot-pages", type=int, default=500)
+    args = parser.parse_args()
+    if not SNAPSHOT_PATH:
+        parser.error("WIKETYM_SNAPSHOT is not set")
+    warm_up(hot_titles(args.log, args.hot_pages) if args.log else [])
+    print(f"Snapshot of {len(API._cache.in_memory())} responses written")
@@ -1,39 +1,266 @@
 import json
-from functools import cache
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import Future
 
 import requests
 
 from ..helpers import load_json
+from ..trace import span
+from .l2 import L2Cache
+from .response_cache import ResponseCache, ResponseStore
+
+CACHE_PATH = "src/wiketym/data/cache.json"
+"""Former cache file, imported into the store the first time it is opened."""
+STORE_PATH = os.environ.get("WIKETYM_CACHE_DB", "src/wiketym/data/cache.sqlite")
+SNAPSHOT_PATH = os.environ.get("WIKETYM_SNAPSHOT")
+"""Pickled responses to start with in memory, written by `warm.warm_up`, if any."""
+
+
+def load_cache() -> ResponseCache:
+    """
+    Open the cached API responses, with those of the snapshot (if configured)
+    in memory, except for the responses stored again since it was taken.
+    At most `WIKETYM_RESPONSE_CACHE_SIZE` bytes of them are kept in memory.
+    """
+    new = not os.path.exists(STORE_PATH)
+    store = ResponseStore(STORE_PATH)
+    if new and os.path.exists(CACHE_PATH):
+        store.set_many(
+            (
+                key,
+                json.dumps(response, ensure_ascii=False).encode("utf-8"),
+                response.get("fetched", 0),
+            )
+            for key, response in load_json(CACHE_PATH).items()
+        )
+    cache = ResponseCache(
+        store, int(os.environ.get("WIKETYM_RESPONSE_CACHE_SIZE", 64 * 1024 * 1024))
+    )
+    if SNAPSHOT_PATH and os.path.exists(SNAPSHOT_PATH):
+        with open(SNAPSHOT_PATH, "rb") as file:
+            snapshot = pickle.load(file)
+        changed = {key for _, key in store.changes(snapshot["change"])}
+        cache.preload(
+            {
+                key: response
+                for key, response in snapshot["responses"].items()
+                if key not in changed
+            }
+        )
+    return cache
 
 
-@cache
 def get_page(title: str) -> dict:
     return API._get_page(title)
 
 
+def get_sections(title: str) -> dict:
+    return API._get_sections(title)
+
+
+def get_section(title: str, index: int) -> str:
+    return API._get_section(title, index)
+
+
 class API:
     """
     Interface for using the Wiktionary API.
     """
 
-    _cache: dict[str:dict] = load_json("src/wiketym/data/cache.json")
-    url: str = "https://en.wiktionary.org/w/api.php"
+    _cache: ResponseCache = load_cache()
+    """Responses by cache key, the most recently used of them in memory."""
+    url: str = os.environ.get("WIKETYM_API_URL", "https://en.wiktionary.org/w/api.php")
+    l2: L2Cache | None = L2Cache.from_url(
+        os.environ.get("WIKETYM_L2_URL"),
+        ttl=int(os.environ.get("WIKETYM_L2_TTL", 7 * 24 * 3600)),
+    )
+    """Cache shared with the other hosts, behind `_cache`, if configured."""
+    stats: dict[str, int] = {"hits": 0, "misses": 0, "coalesced": 0}
+    """
+    Number of responses served from cache, from actual API calls
+    and from the API call already made for the same key by another thread.
+    """
+    min_interval: float = 0
+    """Minimum number of seconds between the starts of actual API calls."""
+    _next_call: float = 0
+    _rate_lock = threading.Lock()
+    _in_flight: dict[str, Future] = {}
+    """Responses being fetched, by cache key."""
+    _flight_lock = threading.Lock()
+
+    @classmethod
+    def snapshot(cls, path: str) -> None:
+        """
+        Pickle the responses in memory, to be loaded by `load_cache`,
+        with the id of the latest change to the store they are up to date with.
+        """
+        snapshot = {
+            "change": cls._cache.store.last_change,
+            "responses": cls._cache.in_memory(),
+        }
+        with open(path, "wb") as file:
+            pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
 
     @classmethod
     def _get_page(cls, title: str) -> dict[str, dict]:
         """
         Return API response either from cache or from actual API call.
         """
-        try:
-            response = cls._cache[title]
-        except KeyError:
-            params = {
-                "action": "parse",
-                "format": "json",
-                "page": title,
-                "prop": "sections|wikitext",
-            }
-            response: dict = requests.get(cls.url, params).json()
-            cls._cache[title] = response
+        return cls._get(title)
+
+    @classmethod
+    def _get_sections(cls, title: str) -> dict[str, dict]:
+        """
+        Return the section index of a page, without its wikitext.
+
+        Pages without sections (redirects, missing pages)
+        come with their full wikitext, as it is small anyway.
+        """
+        if title in cls._cache:
+            response = cls._get_page(title)
+        else:
+            response = cls._get(f"{title}#sections")
+            if response and not response.get("sections"):
+                response = cls._get_page(title)
+        if response.get("sections"):
+            return {"sections": response["sections"]}
+        return response
+
+    @classmethod
+    def _get_section(cls, title: str, index: int) -> str:
+        """
+        Return the wikitext of the section at `index`, including its subsections.
+
+        It is sliced from the full page if that is already cached,
+        otherwise only the section itself is requested.
+        """
+        if title in cls._cache:
+            response = cls._get_page(title)
+            return cls._slice(response, index)
+        response = cls._get(f"{title}#{index}")
+        return response.get("wikitext", {}).get("*", "")
+
+    @staticmethod
+    def _slice(response: dict, index: int) -> str:
+        """Cut the wikitext of a section out of a full page response."""
+        wikitext: bytes = response.get("wikitext", {}).get("*", "").encode("utf-8")
+        start, end, toclevel = None, None, None
+        for section in response.get("sections", []):
+            if int(section["index"]) == index:
+                start, toclevel = section["byteoffset"], section["toclevel"]
+            elif start is not None and section["toclevel"] <= toclevel:
+                end = section["byteoffset"]
+                break
+        if start is None:
+            return ""
+        return wikitext[start:end].decode("utf-8", errors="ignore")
+
+    @classmethod
+    def is_cached(cls, title: str, index: int | None = None) -> bool:
+        """Whether the page, or at least its section at `index`, is cached."""
+        return title in cls._cache or f"{title}#{index}" in cls._cache
+
+    @classmethod
+    def _wait_turn(cls) -> None:
+        """Sleep until an API call is allowed by `min_interval`."""
+        if not cls.min_interval:
+            return
+        with cls._rate_lock:
+            now = time.monotonic()
+            start = max(now, cls._next_call)
+            cls._next_call = start + cls.min_interval
+        time.sleep(start - now)
+
+    @staticmethod
+    def _params(key: str) -> dict:
+        """
+        Parameters of the `parse` request cached under `key`:
+        `title` for a full page, `title#sections` for its section index
+        and `title#index` for the wikitext of a section.
+        """
+        title, _, part = key.partition("#")
+        if not part:
+            return {"page": title, "prop": "sections|wikitext|revid"}
+        if part == "sections":
+            return {"page": title, "prop": "sections|revid"}
+        return {"page": title, "prop": "wikitext|revid", "section": int(part)}
+
+    @classmethod
+    def _get(cls, key: str) -> dict[str, dict]:
+        """
+        Return the `parse` API response cached under `key`,
+        either from cache or from actual API call.
+        """
+        with span("fetch", key=key) as args:
+            try:
+                response = cls._cache[key]
+                cls.stats["hits"] += 1
+                args["cached"] = True
+            except KeyError:
+                response = cls._fetch_once(key, args)
 
         return response.get("parse", {})
+
+    @classmethod
+    def _fetch_once(cls, key: str, args: dict) -> dict:
+        """
+        Fetch the response for `key`, unless another thread is already at it:
+        then wait for its response (or error) instead of making the same call.
+        """
+        with cls._flight_lock:
+            if key in cls._cache:  # fetched since the cache was looked up
+                cls.stats["hits"] += 1
+                args["cached"] = True
+                return cls._cache[key]
+            flight = cls._in_flight.get(key)
+            if leader := flight is None:
+                flight = cls._in_flight[key] = Future()
+            else:
+                cls.stats["coalesced"] += 1
+        if not leader:
+            args["coalesced"] = True
+            return flight.result()
+        try:
+            if cls.l2 and (response := cls.l2.get(key)) is not None:
+                cls._cache[key] = response
+                flight.set_result(response)
+                args |= {"cached": False, "l2": True}
+                return response
+            response, size = cls._fetch(key)
+            flight.set_result(response)
+            args |= {"cached": False, "bytes": size}
+            return response
+        except BaseException as error:
+            flight.set_exception(error)
+            raise
+        finally:
+            with cls._flight_lock:
+                del cls._in_flight[key]
+
+    @classmethod
+    def _fetch(cls, key: str) -> tuple[dict, int]:
+        """
+        Make the actual API call for `key` and cache its response
+        (replacing any previous one in place), stamped with its fetch time.
+        Return the response with its size in bytes.
+        """
+        cls._wait_turn()
+        params = {"action": "parse", "format": "json"} | cls._params(key)
+        reply = requests.get(cls.url, params)
+        response: dict = reply.json()
+        response["fetched"] = int(time.time())
+        cls._cache[key] = response
+        if cls.l2:
+            cls.l2.set(key, response)
+        cls.stats["misses"] += 1
+        return response, len(reply.content)
+
+    @classmethod
+    def query(cls, **params) -> dict:
+        """Make an uncached `query` API call, e.g. for page metadata."""
+        cls._wait_turn()
+        params = {"action": "query", "format": "json", "formatversion": 2} | params
+        return requests.get(cls.url, params).json()
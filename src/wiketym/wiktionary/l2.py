@@ -0,0 +1,267 @@
+"""
+Second-level cache of API responses shared by all app hosts,
+on any server speaking the memcached text protocol.
+
+Point the app to it through `WIKETYM_L2_URL`, or run a local stand-in:
+
+    python -m src.wiketym.wiktionary.l2 --port 11211
+    WIKETYM_L2_URL=memcache://localhost:11211 gunicorn web:app
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import socket
+import socketserver
+import threading
+import time
+import zlib
+from contextlib import suppress
+from typing import Callable
+from urllib.parse import urlparse
+
+
+class L2Error(Exception):
+    """Raised when the cache server closes the connection mid-reply."""
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing server after `threshold` failures in a row,
+    then let a single call through every `cooldown` seconds to probe it.
+    """
+
+    def __init__(self, threshold: int = 3, cooldown: float = 30) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        """Failures in a row."""
+        self.opened_at: float | None = None
+        """When the circuit was last opened, if it is open."""
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether to make a call now."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                self.opened_at = time.monotonic()  # one probe per cooldown
+                return True
+            return False
+
+    def succeeded(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def failed(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+    @property
+    def state(self) -> str:
+        return "closed" if self.opened_at is None else "open"
+
+
+class L2Cache:
+    """
+    Client storing API responses as zlib-compressed JSON
+    under hashed keys, for `ttl` seconds.
+
+    Every error is swallowed: the caller then fetches from the API,
+    and the `breaker` spares it the timeouts of a server which is down.
+    """
+
+    PREFIX = "wiketym:"
+    COMPRESSED = 1
+    """Flag of the values stored compressed."""
+    MAX_TTL = 30 * 24 * 3600
+    """Longest TTL memcached takes as a duration rather than a timestamp."""
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 11211,
+        ttl: int = 7 * 24 * 3600,
+        timeout: float = 0.5,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
+        self.address = (host, port)
+        self.ttl = min(ttl, self.MAX_TTL)
+        """Seconds the responses are kept for."""
+        self.timeout = timeout
+        """Seconds to wait for the server before giving up a call."""
+        self.breaker = breaker or CircuitBreaker()
+        self.stats = {"hits": 0, "misses": 0, "errors": 0, "skipped": 0}
+        self._local = threading.local()
+        """Connection of each thread."""
+
+    @classmethod
+    def from_url(cls, url: str | None, **kwargs) -> L2Cache | None:
+        """Client for a `memcache://host:port` URL, if any."""
+        if not url:
+            return None
+        url = urlparse(url)
+        return cls(url.hostname or "localhost", url.port or 11211, **kwargs)
+
+    def _key(self, key: str) -> bytes:
+        """Memcached key of a cache key, which may be long or hold spaces."""
+        return (self.PREFIX + hashlib.sha1(key.encode("utf-8")).hexdigest()).encode()
+
+    def get(self, key: str) -> dict | None:
+        """The response cached under `key`, if any and if reachable."""
+        reply = self._call(b"get " + self._key(key) + b"\r\n", self._got_value)
+        if not reply or not reply.startswith(b"VALUE "):
+            if reply is not None:
+                self.stats["misses"] += 1
+            return None
+        header, _, rest = reply.partition(b"\r\n")
+        _, _, flags, size = header.split()
+        data = rest[: int(size)]
+        if int(flags) & self.COMPRESSED:
+            data = zlib.decompress(data)
+        self.stats["hits"] += 1
+        return json.loads(data)
+
+    def set(self, key: str, response: dict) -> None:
+        """Cache `response` under `key`, if reachable."""
+        data = zlib.compress(json.dumps(response, ensure_ascii=False).encode("utf-8"))
+        command = b"set %s %d %d %d\r\n" % (
+            self._key(key),
+            self.COMPRESSED,
+            self.ttl,
+            len(data),
+        )
+        self._call(command + data + b"\r\n", lambda reply: reply.endswith(b"\r\n"))
+
+    @staticmethod
+    def _got_value(reply: bytes) -> bool:
+        """Whether the whole reply to a `get` has been received."""
+        header, found, rest = reply.partition(b"\r\n")
+        if not found or not header.startswith(b"VALUE "):
+            return bool(found)
+        return len(rest) >= int(header.split()[3]) + len(b"\r\nEND\r\n")
+
+    def _call(self, command: bytes, complete: Callable[[bytes], bool]) -> bytes | None:
+        """Send `command` and return its `complete` reply, `None` on error."""
+        if not self.breaker.allow():
+            self.stats["skipped"] += 1
+            return None
+        try:
+            sock = self._connection()
+            sock.sendall(command)
+            reply = b""
+            while not complete(reply):
+                if not (chunk := sock.recv(65536)):
+                    raise L2Error("connection closed")
+                reply += chunk
+        except (OSError, L2Error):
+            self._disconnect()
+            self.breaker.failed()
+            self.stats["errors"] += 1
+            return None
+        self.breaker.succeeded()
+        if reply.startswith((b"ERROR", b"CLIENT_ERROR", b"SERVER_ERROR")):
+            self.stats["errors"] += 1  # e.g. a value too large, not an outage
+            return None
+        return reply
+
+    def _connection(self) -> socket.socket:
+        if (sock := getattr(self._local, "sock", None)) is None:
+            sock = socket.create_connection(self.address, self.timeout)
+            self._local.sock = sock
+        return sock
+
+    def _disconnect(self) -> None:
+        if (sock := getattr(self._local, "sock", None)) is not None:
+            sock.close()
+            self._local.sock = None
+
+
+class L2Server:
+    """
+    Local stand-in for a memcached server, with `get`, `set` and `delete`
+    only, keeping values in memory until they expire.
+    """
+
+    def __init__(self) -> None:
+        self.values: dict[bytes, tuple[int, float | None, bytes]] = {}
+        """Flags, expiry time and data, by key."""
+        self._server: socketserver.ThreadingTCPServer | None = None
+        self._connections: set[socket.socket] = set()
+
+    def handle(self, line: bytes, rfile) -> bytes:
+        """Reply to the command `line`, reading its data from `rfile`."""
+        command, *args = line.split()
+        if command == b"get":
+            reply = b""
+            for key in args:
+                flags, expiry, data = self.values.get(key, (0, None, None))
+                if expiry is not None and expiry <= time.time():
+                    del self.values[key]
+                    data = None
+                if data is not None:
+                    reply += b"VALUE %s %d %d\r\n%s\r\n" % (key, flags, len(data), data)
+            return reply + b"END\r\n"
+        if command == b"set":
+            key, flags, ttl, size = args[0], int(args[1]), int(args[2]), int(args[3])
+            data = rfile.read(size + 2)[:size]
+            self.values[key] = (flags, time.time() + ttl if ttl else None, data)
+            return b"STORED\r\n"
+        if command == b"delete":
+            return (
+                b"DELETED\r\n" if self.values.pop(args[0], None) else b"NOT_FOUND\r\n"
+            )
+        return b"ERROR\r\n"
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"memcache://{host}:{port}"
+
+    def start(self, port: int = 0) -> L2Server:
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                stub._connections.add(self.connection)
+                try:
+                    while line := self.rfile.readline():
+                        self.wfile.write(stub.handle(line, self.rfile))
+                finally:
+                    stub._connections.discard(self.connection)
+
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving, closing the open connections as well."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for connection in list(self._connections):
+            with suppress(OSError):
+                connection.shutdown(socket.SHUT_RDWR)
+
+    def __enter__(self) -> L2Server:
+        return self.start()
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=11211)
+    args = parser.parse_args()
+    server = L2Server().start(args.port)
+    print(f"Caching at {server.url}")
+    threading.Event().wait()
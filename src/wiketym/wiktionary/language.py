@@ -18,6 +18,11 @@ class Language:
 
     lang_data = load_json("src/wiketym/data/langs.json")
 
+    codes: dict[str, str] = {
+        lang_obj["name"]: code for code, lang_obj in reversed(lang_data.items())
+    }
+    """Language code by language name (the first one listed)."""
+
     @cache
     def __new__(cls, code):
         return object.__new__(cls)
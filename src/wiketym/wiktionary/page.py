@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from functools import cache
+import os
+import re
 from typing import Iterator
 
 import src.wiketym.wiktionary as wkt
@@ -9,31 +10,60 @@ from cacheable_iter import iter_cache
 from ..helpers import filter, get
 from . import api
 from .language import Language
+from .registry import Registry
 
 
 class Page:
     """
     Interface to a Wiktionary Page.
 
-    Get a `Page` guaranteed to be unique within this run,
+    Get a `Page` guaranteed to be unique while it is in use,
     otherwise create and initialise one.
     """
 
-    @cache  # this ensures no duplicates
+    registry = Registry(
+        max_size=int(os.environ.get("WIKETYM_PAGE_CACHE_SIZE", 64 * 1024 * 1024))
+    )
+    """Pages kept in memory, bounded by the bytes of their wikitext."""
+
+    scoped: bool = True
+    """Whether to fetch only the wikitext of the language sections in use."""
+
     def __new__(cls, title):
-        return object.__new__(cls)
+        if (page := cls.registry.get(title)) is None:
+            page = object.__new__(cls)
+        return page
 
     def __init__(self, title: str) -> None:
+        if "title" in self.__dict__:  # already initialised
+            return
         self.title = title
         """Title of the page."""
-        json = api.get_page(title)
+        json = api.get_sections(title) if self.scoped else api.get_page(title)
+
+        self._wikitext: bytes | None = None
+        """Full wikitext, if loaded."""
+        if not self.scoped or not json.get("sections"):
+            self._wikitext = json.get("wikitext", {}).get("*", "").encode("utf-8")
 
-        self.wikitext: str = json.get("wikitext", {}).get("*", "")
-        """Full wikitext."""
+        self._slices: dict[int, bytes] = {}
+        """Wikitext of the loaded language sections, by section index."""
 
         self.sections = [wkt.Section(self, **obj) for obj in json.get("sections", [])]
         """`Section` objects for the current page."""
 
+        self.registry.add(title, self)
+
+    @classmethod
+    def empty(cls) -> Page:
+        """Page without sections nor wikitext, neither fetched nor registered."""
+        page = object.__new__(cls)
+        page.title = ""
+        page._wikitext = b""
+        page._slices = {}
+        page.sections = []
+        return page
+
     @iter_cache
     def __iter__(self) -> Iterator[wkt.Section]:
         return filter(self.sections, toclevel=1)
@@ -44,8 +74,61 @@ class Page:
         else:
             return get(self, line=Language(lang).name, __default=wkt.Section())
 
+    @property
+    def wikitext(self) -> str:
+        """Full wikitext, fetched on first access for scoped pages."""
+        self._load()
+        return self._wikitext.decode("utf-8")
+
+    def _load(self) -> None:
+        """Ensure the full wikitext is loaded, replacing any section slices."""
+        if self._wikitext is None:
+            json = api.get_page(self.title)
+            self._wikitext = json.get("wikitext", {}).get("*", "").encode("utf-8")
+            self._slices.clear()
+            self.registry.resize(self.title)
+
+    def text(self, start: int, end: int | None = None) -> str:
+        """
+        Wikitext between two byte offsets.
+
+        For scoped pages, only the language section enclosing `start` is loaded
+        and the text is cut at its end.
+        """
+        if self._wikitext is not None:
+            return self._wikitext[start:end].decode("utf-8", errors="ignore")
+        lang_sections = [s for s in self if s.byteoffset <= start]
+        if not lang_sections:  # lead text, before any language
+            self._load()
+            return self.text(start, end)
+        lang_section = lang_sections[-1]
+        if lang_section.index not in self._slices:
+            text = api.get_section(self.title, lang_section.index)
+            self._slices[lang_section.index] = text.encode("utf-8")
+            self.registry.resize(self.title)
+        base = lang_section.byteoffset
+        end = None if end is None else end - base
+        text = self._slices[lang_section.index][start - base : end]
+        return text.decode("utf-8", errors="ignore")
+
+    @property
+    def redirect(self) -> str | None:
+        """Title this page redirects to, if any."""
+        if not self.sections:
+            if match := re.match(r"#REDIRECT \[\[(.+)\]\]", self.wikitext):
+                return match[1]
+
+    @property
+    def size(self) -> int:
+        """Bytes of wikitext held by this page, with the text its sections cache."""
+        size = len(self._wikitext or b"") + sum(map(len, self._slices.values()))
+        for section in self.sections:
+            for name in ("wikitext", "strict_wikitext"):
+                size += len(section.__dict__.get(name, ""))
+        return size
+
     def __repr__(self) -> str:
         return f"Page({self.title})"
 
     def __bool__(self) -> bool:
-        return self.wikitext != ""
+        return bool(self.sections or self._wikitext)
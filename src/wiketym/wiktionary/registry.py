@@ -0,0 +1,94 @@
+"""
+Size-aware registry of objects, with LRU eviction.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Hashable
+from weakref import WeakValueDictionary
+
+
+class Registry:
+    """
+    Mapping of keys to unique objects, bounded by the total `size`
+    of the objects it keeps alive.
+
+    Least recently used objects are evicted once `max_size` is exceeded.
+    Evicted objects which are still referenced elsewhere (e.g. by `Word`s
+    of a running query) are kept track of through weak references,
+    so they are returned again instead of being duplicated.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        """Budget for the sum of `size` over the retained objects."""
+        self.size = 0
+        """Current sum of `size` over the retained objects."""
+        self._lru: OrderedDict[Hashable, Any] = OrderedDict()
+        self._sizes: dict[Hashable, int] = {}
+        self._live: WeakValueDictionary[Hashable, Any] = WeakValueDictionary()
+
+    def get(self, key: Hashable) -> Any | None:
+        """
+        Return the object registered under `key` and mark it as recently used,
+        or `None` if there is no such object alive.
+        """
+        if key in self._lru:
+            self._lru.move_to_end(key)
+            return self._lru[key]
+        if (obj := self._live.get(key)) is not None:
+            self.add(key, obj)  # back in use, retain it again
+        return obj
+
+    def add(self, key: Hashable, obj: Any) -> None:
+        """Register `obj` under `key`, then evict to fit the budget."""
+        self._live[key] = obj
+        self._lru[key] = obj
+        self._lru.move_to_end(key)
+        self.resize(key)
+
+    def resize(self, key: Hashable) -> None:
+        """Account again for the `size` of the object under `key`."""
+        if key not in self._lru:
+            return
+        size = self._lru[key].size
+        self.size += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
+        self._evict()
+
+    def discard(self, key: Hashable) -> None:
+        """Forget the object under `key` altogether."""
+        self._live.pop(key, None)
+        if key in self._lru:
+            del self._lru[key]
+            self.size -= self._sizes.pop(key)
+
+    def clear(self) -> None:
+        self._lru.clear()
+        self._sizes.clear()
+        self._live.clear()
+        self.size = 0
+
+    def _evict(self) -> None:
+        while self.size > self.max_size and len(self._lru) > 1:
+            key, _ = self._lru.popitem(last=False)
+            self.size -= self._sizes.pop(key)
+
+    @property
+    def live(self) -> int:
+        """Number of objects still alive, retained or not."""
+        return len(self._live)
+
+    @property
+    def live_size(self) -> int:
+        """Sum of `size` over the objects still alive, retained or not."""
+        return sum(obj.size for obj in list(self._live.values()))
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._lru or key in self._live
+
+    def __repr__(self) -> str:
+        return f"Registry({len(self)} objects, {self.size}/{self.max_size})"
@@ -0,0 +1,256 @@
+"""
+Cache of API responses: all of them in an SQLite file shared by the processes
+of a host, the most recently used also in memory, up to a size in bytes.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Callable, Iterable, Iterator
+
+
+class ResponseStore:
+    """
+    API responses as zlib-compressed JSON, by cache key, in an SQLite file.
+
+    Each process and thread opens its own connection, so the store can be used
+    before and after gunicorn forks its workers. Every write of a key gives it
+    a new, higher change id, which tells the other processes what changed.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        """Connection of each thread, with the id of the process which opened it."""
+
+    def _connection(self) -> sqlite3.Connection:
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():  # none yet, or forked
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "change INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "key TEXT UNIQUE NOT NULL, "
+                "fetched INTEGER NOT NULL, "
+                "data BLOB NOT NULL)"
+            )
+            local.db, local.pid = db, os.getpid()
+        return local.db
+
+    def get(self, key: str) -> tuple[int, bytes] | None:
+        """Id of the latest change to `key` and JSON of its response, if any."""
+        row = (
+            self._connection()
+            .execute("SELECT change, data FROM responses WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return (row[0], zlib.decompress(row[1])) if row else None
+
+    def set_many(self, items: Iterable[tuple[str, bytes, int]]) -> None:
+        """Store JSON responses with their fetch time, by key, in one transaction."""
+        with self._connection() as db:
+            db.execute("BEGIN")
+            db.executemany(
+                "REPLACE INTO responses (key, fetched, data) VALUES (?, ?, ?)",
+                ((key, fetched, zlib.compress(data)) for key, data, fetched in items),
+            )
+
+    def set(self, key: str, data: bytes, fetched: int = 0) -> int:
+        """Store a JSON response with its fetch time. Return the id of the change."""
+        return (
+            self._connection()
+            .execute(
+                "REPLACE INTO responses (key, fetched, data) VALUES (?, ?, ?)",
+                (key, fetched, zlib.compress(data)),
+            )
+            .lastrowid
+        )
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def keys(self) -> list[str]:
+        """Stored keys, from the least recently written."""
+        rows = self._connection().execute("SELECT key FROM responses ORDER BY change")
+        return [key for key, in rows]
+
+    def changes(self, since: int) -> list[tuple[int, str]]:
+        """Change id and key of the writes made after change `since`."""
+        rows = self._connection().execute(
+            "SELECT change, key FROM responses WHERE change > ? ORDER BY change",
+            (since,),
+        )
+        return rows.fetchall()
+
+    @property
+    def last_change(self) -> int:
+        """Id of the latest write, 0 if none."""
+        row = self._connection().execute("SELECT max(change) FROM responses")
+        return row.fetchone()[0] or 0
+
+    def __contains__(self, key: str) -> bool:
+        row = (
+            self._connection()
+            .execute("SELECT 1 FROM responses WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return row is not None
+
+    def __len__(self) -> int:
+        return (
+            self._connection().execute("SELECT count(*) FROM responses").fetchone()[0]
+        )
+
+
+class ResponseCache(MutableMapping):
+    """
+    Mapping of cache keys to API responses, written through to `store`
+    and read back from it when not in memory.
+
+    Responses are kept in memory up to `max_size` bytes of JSON,
+    least recently used first out. Without a store, evicted responses are lost
+    and fetched again when needed.
+    """
+
+    def __init__(self, store: ResponseStore | None, max_size: int) -> None:
+        self.store = store
+        self.max_size = max_size
+        """Budget for the bytes of JSON of the responses kept in memory."""
+        self.size = 0
+        """Bytes of JSON of the responses kept in memory."""
+        self._lru: OrderedDict[str, dict] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._changes: dict[str, int | None] = {}
+        """Id of the store change of each response in memory, if known."""
+        self._lock = threading.Lock()
+        self._synced = store.last_change if store is not None else 0
+        """Id of the latest store change looked at by `updates`."""
+        self._sync_lock = threading.Lock()
+        self.listeners: list[Callable[[str, dict | None], None]] = []
+        """
+        Called with each key stored, with its response, or deleted, with `None`,
+        by this instance or, as seen by `updates`, by another process.
+        """
+
+    def __getitem__(self, key: str) -> dict:
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                return self._lru[key]
+        if self.store is None or (stored := self.store.get(key)) is None:
+            raise KeyError(key)
+        change, data = stored
+        response = json.loads(data)
+        self._retain(key, response, len(data), change)
+        return response
+
+    def __setitem__(self, key: str, response: dict) -> None:
+        data = json.dumps(response, ensure_ascii=False).encode("utf-8")
+        change = None
+        if self.store is not None:
+            change = self.store.set(key, data, response.get("fetched", 0))
+        self._retain(key, response, len(data), change)
+        for listener in self.listeners:
+            listener(key, response)
+
+    def __delitem__(self, key: str) -> None:
+        found = self.forget(key)
+        if self.store is not None and key in self.store:
+            self.store.delete(key)
+            found = True
+        if not found:
+            raise KeyError(key)
+        for listener in self.listeners:
+            listener(key, None)
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            keys = list(self._lru)
+        return iter(keys if self.store is None else self.store.keys())
+
+    def __len__(self) -> int:
+        return len(self._lru) if self.store is None else len(self.store)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._lru or (self.store is not None and key in self.store)
+
+    def forget(self, key: str) -> bool:
+        """Drop the response under `key` from memory only. Return whether it was."""
+        with self._lock:
+            if key not in self._lru:
+                return False
+            del self._lru[key]
+            self.size -= self._sizes.pop(key)
+            del self._changes[key]
+            return True
+
+    def updates(self) -> list[str]:
+        """
+        Keys stored since the last call by other processes (e.g. the refresh
+        job) or other instances, whose responses in memory are dropped.
+        """
+        if self.store is None:
+            return []
+        with self._sync_lock:
+            changes = self.store.changes(self._synced)
+            if changes:
+                self._synced = changes[-1][0]
+        updated = []
+        for change, key in changes:
+            if self._changes.get(key, 0) != change:  # not the response in memory
+                self.forget(key)
+                updated.append(key)
+        if self.listeners:
+            for key, response in self.stored(updated):
+                for listener in self.listeners:
+                    listener(key, response)
+        return updated
+
+    def stored(self, keys: Iterable[str]) -> Iterator[tuple[str, dict | None]]:
+        """
+        Keys with their response (`None` if there is none), read from memory
+        or from the store, without keeping them in memory.
+        """
+        for key in keys:
+            with self._lock:
+                response = self._lru.get(key)
+            if response is None and self.store is not None:
+                if (stored := self.store.get(key)) is not None:
+                    response = json.loads(stored[1])
+            yield key, response
+
+    def preload(self, responses: dict[str, dict]) -> None:
+        """Keep `responses` in memory, as read from the store (not written to it)."""
+        for key, response in responses.items():
+            data = json.dumps(response, ensure_ascii=False).encode("utf-8")
+            self._retain(key, response, len(data))
+
+    def in_memory(self) -> dict[str, dict]:
+        """Responses kept in memory, from the least recently used."""
+        with self._lock:
+            return dict(self._lru)
+
+    def _retain(
+        self, key: str, response: dict, size: int, change: int | None = None
+    ) -> None:
+        """Keep `response` in memory as the most recently used, then evict."""
+        with self._lock:
+            self._lru[key] = response
+            self._lru.move_to_end(key)
+            self.size += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+            self._changes[key] = change
+            while self.size > self.max_size and len(self._lru) > 1:
+                evicted, _ = self._lru.popitem(last=False)
+                self.size -= self._sizes.pop(evicted)
+                del self._changes[evicted]
+
+    def __repr__(self) -> str:
+        return f"ResponseCache({len(self._lru)} in memory, {self.size}/{self.max_size})"
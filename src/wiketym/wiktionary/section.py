@@ -16,7 +16,7 @@ class Section:
 
     def __init__(
         self,
-        page: wkt.Page = wkt.Page("DUMMY"),
+        page: wkt.Page | None = None,
         toclevel: int = 0,
         line: str = "",
         number: str = "",
@@ -24,8 +24,8 @@ class Section:
         byteoffset: int = 0,
         **_,
     ) -> None:
-        self.page = page
-        """The `Page` this `Section` belongs to."""
+        self.page = wkt.Page.empty() if page is None else page
+        """The `Page` this `Section` belongs to (an empty one by default)."""
 
         self.line: str = line
         """The title of the section."""
@@ -71,9 +71,10 @@ class Section:
             index=lambda x: x > self.index,
             toclevel=lambda x: x == self.toclevel,
         )
-        return self.page.wikitext[
-            self.byteoffset : getattr(next_section, "byteoffset", None)
-        ]
+        text = self.page.text(
+            self.byteoffset, getattr(next_section, "byteoffset", None)
+        )
+        return self._hold("wikitext", text)
 
     @cached_property
     def strict_wikitext(self):
@@ -81,6 +82,13 @@ class Section:
             self.page.sections,
             index=lambda x: x > self.index,
         )
-        return self.page.wikitext[
-            self.byteoffset : getattr(next_section, "byteoffset", None)
-        ]
+        text = self.page.text(
+            self.byteoffset, getattr(next_section, "byteoffset", None)
+        )
+        return self._hold("strict_wikitext", text)
+
+    def _hold(self, name: str, text: str) -> str:
+        """Cache `text` as attribute `name`, counted in the size of the page."""
+        self.__dict__[name] = text
+        self.page.registry.resize(self.page.title)
+        return text
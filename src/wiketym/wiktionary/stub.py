@@ -0,0 +1,195 @@
+"""
+Local stand-in for the Wiktionary API, serving pages from memory.
+
+Run it with the pages of a cache file, then point the app to it
+through `WIKETYM_API_URL`:
+
+    python -m src.wiketym.wiktionary.stub src/wiketym/data/cache.json --port 8080
+    WIKETYM_API_URL=http://localhost:8080/w/api.php gunicorn web:app
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from ..helpers import load_json
+from .api import API
+
+
+def parse_response(title: str, wikitext: str, revid: int = 1) -> dict:
+    """Build the `parse` API response of a page, with sections found by headings."""
+    sections = []
+    numbers: list[int] = []
+    for i, match in enumerate(
+        re.finditer(r"^(={2,6})([^=].*?)\1[ \t]*$", wikitext, flags=re.MULTILINE)
+    ):
+        toclevel = len(match[1]) - 1
+        numbers = numbers[:toclevel] + [0] * (toclevel - len(numbers))
+        numbers[toclevel - 1] += 1
+        sections.append(
+            {
+                "toclevel": toclevel,
+                "level": str(toclevel + 1),
+                "line": match[2].strip(),
+                "number": ".".join(map(str, numbers)),
+                "index": str(i + 1),
+                "byteoffset": len(wikitext[: match.start()].encode("utf-8")),
+            }
+        )
+    return {
+        "parse": {
+            "title": title,
+            "revid": revid,
+            "wikitext": {"*": wikitext},
+            "sections": sections,
+        }
+    }
+
+
+class StubServer:
+    """
+    HTTP server answering `action=parse` requests like the Wiktionary API,
+    as well as `action=query` requests for the latest revisions of pages
+    and for recent changes, optionally after a `delay` in seconds.
+    """
+
+    def __init__(self, pages: dict[str, str] | None = None, delay: float = 0) -> None:
+        self.pages: dict[str, str] = dict(pages or {})
+        """Wikitext by page title."""
+        self.revisions: dict[str, int] = {title: 1 for title in self.pages}
+        """Latest revision id by page title."""
+        self.delay = delay
+        """Seconds to wait before answering each request."""
+        self.changes: list[dict] = []
+        """Recent changes made through `edit`, newest first."""
+        self.requests: list[dict[str, str]] = []
+        """Parameters of every request received."""
+        self._server: ThreadingHTTPServer | None = None
+
+    @classmethod
+    def from_cache(cls, path: str, **kwargs) -> StubServer:
+        """Serve the full pages of a cache file, as written by `API`."""
+        pages = {
+            title: response["parse"]["wikitext"]["*"]
+            for title, response in load_json(path).items()
+            if "#" not in title and "wikitext" in response.get("parse", {})
+        }
+        return cls(pages, **kwargs)
+
+    def edit(self, title: str, wikitext: str) -> None:
+        """Change the wikitext of a page, as a new revision."""
+        self.pages[title] = wikitext
+        self.revisions[title] = self.revisions.get(title, 0) + 1
+        self.changes.insert(
+            0,
+            {
+                "title": title,
+                "revid": self.revisions[title],
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            },
+        )
+
+    def respond(self, params: dict[str, str]) -> dict:
+        """API response to a request with `params`."""
+        if params.get("action") == "query":
+            return self._query(params)
+        title = params.get("page", "")
+        if title not in self.pages:
+            return {
+                "error": {"code": "missingtitle", "info": "The page doesn't exist."}
+            }
+        wikitext = self.pages[title]
+        response = parse_response(title, wikitext, self.revisions[title])
+        if (section := params.get("section")) is not None:
+            response["parse"]["wikitext"]["*"] = API._slice(
+                response["parse"], int(section)
+            )
+            response["parse"]["sections"] = []
+        props = params.get("prop", "").split("|")
+        for prop in ("wikitext", "sections", "revid"):
+            if prop not in props:
+                response["parse"].pop(prop, None)
+        return response
+
+    def _query(self, params: dict[str, str]) -> dict:
+        if params.get("list") == "recentchanges":
+            changes = [
+                change
+                for change in self.changes
+                if change["timestamp"] >= params.get("rcend", "")
+            ]
+            start = int(params.get("rccontinue", 0))
+            end = start + int(params.get("rclimit", 10))
+            response = {"query": {"recentchanges": changes[start:end]}}
+            if end < len(changes):
+                response["continue"] = {"rccontinue": str(end), "continue": "-||"}
+            return response
+        pages = []
+        for title in params.get("titles", "").split("|"):
+            if title in self.pages:
+                revisions = [{"revid": self.revisions[title]}]
+                pages.append({"title": title, "revisions": revisions})
+            else:
+                pages.append({"title": title, "missing": True})
+        return {"query": {"pages": pages}}
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/w/api.php"
+
+    def start(self, port: int = 0) -> StubServer:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = {
+                    key: values[-1]
+                    for key, values in parse_qs(urlparse(self.path).query).items()
+                }
+                stub.requests.append(params)
+                if stub.delay:
+                    time.sleep(stub.delay)
+                body = json.dumps(stub.respond(params)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> StubServer:
+        return self.start()
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("cache", help="cache file with the pages to serve")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--delay", type=float, default=0, help="seconds per request")
+    args = parser.parse_args()
+    stub = StubServer.from_cache(args.cache, delay=args.delay).start(args.port)
+    print(f"Serving {len(stub.pages)} pages at {stub.url}")
+    threading.Event().wait()
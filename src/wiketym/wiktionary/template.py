@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import re
+from typing import Iterator
 
 from ..helpers import load_json
+from ..trace import span
 
 
 class Term:
@@ -137,6 +139,11 @@ class Template:
 
     @staticmethod
     def parse_all(text: str) -> list[Template]:
+        with span("parse_all", chars=len(text)):
+            return Template._parse_all(text)
+
+    @staticmethod
+    def _parse_all(text: str) -> list[Template]:
         matches = re.findall(
             r"""
             \{\{
@@ -152,5 +159,13 @@ class Template:
         )
         return [Template(match) for match in matches] if matches else []
 
+    @staticmethod
+    def links(text: str) -> Iterator[tuple[str, Term]]:
+        """Yield the link type and the term of every linking template in `text`."""
+        for tpl in Template.parse_all(text):
+            if tpl.type in Template.TO_LINK_MAPPING:
+                for term in tpl.terms:
+                    yield Template.TO_LINK_MAPPING[tpl.type], term
+
     def __repr__(self) -> str:
         return f"{self.type} {self.params}"
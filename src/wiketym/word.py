@@ -2,12 +2,14 @@ from __future__ import annotations
 
 import re
 import textwrap
-import unicodedata
-from functools import cache, cached_property
+from functools import cached_property
 
 
 from .helpers import get, load_json, nlp
+from .link_filter import LinkFilter
+from .link_index import LinkIndex, canonical
 from .wiktionary import Language, Page, Section, Template
+from .wiktionary.template import Term
 
 
 class Word:
@@ -23,101 +25,99 @@ class Word:
         "Root",
     }
 
-    @cache
+    index = LinkIndex()
+    """Reverse index of the links resolved so far."""
+
+    _instances: dict[tuple[str, str], Word] = {}
+    """Words created so far, by canonical lemma and language code."""
+
     def __new__(cls, lemma, lang_code):
-        return object.__new__(cls)
+        key = canonical(lemma, lang_code)
+        try:
+            return cls._instances[key]
+        except KeyError:
+            word = cls._instances[key] = object.__new__(cls)
+            return word
 
     def __init__(self, lemma: str, lang_code: str) -> None:
+        if "lemma" in self.__dict__:  # already initialised
+            return
 
-        self.lemma: str = lemma
-        """Dictionary lookup form of the word."""
+        self.shown_lang: Language = Language(lang_code)
+        """Language of the word as first written, shown in graphs."""
+        self.shown_lemma: str = lemma
+        """Lemma of the word as first written, shown in graphs."""
+
+        lemma, lang_code = canonical(lemma, lang_code)
 
         self.lang: Language = Language(lang_code)
         """Object holding metadata for the language of the word."""
 
-        self.page: Page = Page(self.page_title)
-        """Wiktionary Page of this word."""
-
-        self.entry: Section = self.page[self.lang]
-        """Wikipedia Page Section corresponding to this word."""
-
-        self.meaning_section: Section = self.entry.get(line=self.is_meaning_section)
-
-        self.etymology_section: Section = self.entry.get(
-            line=lambda x: x.startswith("Etymology")
-        )
-
-        # self.templates: list[Template] = Template.parse_all(
-        #     self.entry.get(line=lambda x: x.startswith("Etymology")).strict_wikitext
-        # )
-        # """List of all parsed templates in the Etymology section wikitext."""
+        self.lemma: str = lemma
+        """Dictionary lookup form of the word, as in the title of its page."""
 
         self.level = None
         """Distance from this word to one of the original words in the query."""
-        # self.links: dict[str, list[Word]] = load_json(
-        #     "src/wiketym/data/link_types.json"
-        # )
-        # """Dictionary of link types to this word."""
-
-        # self._ensure_redirect()
-
-        # self._populate_links(Template.Type.ALL)
-        if self.redirects_to() or self.equivalent_to() or self.accents_stripped_from():
-            self.entry.wikitext = " "
-
-        # self.meaning_wikitext: str = self.entry.get(
-        #     line=self.is_meaning_section
-        # ).wikitext
+        self.frontier = False
+        """Whether the expansion of this word was cut short by a query budget."""
 
         self._template_meaning = ""
         self._reference_meaning = ""
         self.translit = ""
 
+    @classmethod
+    def clear(cls) -> None:
+        """Forget all words created so far."""
+        cls._instances.clear()
+
+    @cached_property
+    def page(self) -> Page:
+        """Wiktionary Page of this word."""
+        return Page(self.page_title)
+
+    @cached_property
+    def entry(self) -> Section:
+        """Wikipedia Page Section corresponding to this word."""
+        entry = self.page[self.lang]
+        if self.redirects_to():
+            entry.wikitext = " "
+        return entry
+
+    @cached_property
+    def meaning_section(self) -> Section:
+        return self.entry.get(line=self.is_meaning_section)
+
+    @cached_property
+    def etymology_section(self) -> Section:
+        return self.entry.get(line=lambda x: x.startswith("Etymology"))
+
     def redirects_to(self) -> str | None:
-        if match := re.match(r"#REDIRECT \[\[(.+)\]\]", self.page.wikitext):
-            lemma = match[1]
+        if lemma := self.page.redirect:
             if "/" in lemma:
                 lemma = "*" + lemma.split("/", maxsplit=1)[1]
             return lemma
 
-    def equivalent_to(self) -> Word | None:
-        if self.lang.name != self.lang.page_name:
-            for lang_code, data in Language.lang_data.items():
-                if data["name"] == self.lang.page_name:
-                    return Word(self.lemma, lang_code)
-
-    def accents_stripped_from(self) -> Word | None:
-        if self.lang.diacr:
-            if self.stripped_lemma != self.lemma:
-                return Word(self.stripped_lemma, self.lang.code)
-
     @property
-    def stripped_lemma(self):
-        lemma = self.lemma
-        nkfd_form = unicodedata.normalize("NFKD", lemma)
-        if self.lang.page_name != "Ancient Greek":
-            lemma = "".join(c for c in nkfd_form if not unicodedata.combining(c))
-        else:  # Special case for Greek incomplete stripping
-            lemma = "".join(
-                c
-                for c in nkfd_form
-                if unicodedata.name(c) not in {"COMBINING MACRON", "COMBINING BREVE"}
-            )
-        # Normalise back to ensure equality
-        lemma = unicodedata.normalize("NFKC", lemma)
-        return lemma
+    def key(self) -> tuple[str, str]:
+        return self.lemma, self.lang.code
 
     @property
     def page_title(self):
         """
         Infer the title of the Wiktionary page providing information
-        about this lemma and language code by:
-        - stripping accents when necessary according to the language
-        - applying the page naming conventions for reconstrcuted lemmas
+        about this lemma and language code by
+        applying the page naming conventions for reconstrcuted lemmas.
+        Accents are already stripped from the lemma (see `canonical`).
         """
         # Change page title for reconstructed lemmas
         return self.lemma.replace("*", f"Reconstruction:{self.lang.page_name}/")
 
+    @property
+    def url(self) -> str:
+        """Address of the entry of this word on Wiktionary."""
+        anchor = self.lang.page_name.replace(" ", "_")
+        return f"https://en.wiktionary.org/wiki/{self.page_title}#{anchor}"
+
     @property
     def meaning_wikitext(self):
         return self.meaning_section.wikitext
@@ -128,27 +128,57 @@ class Word:
                 return False
         return True
 
+    @cached_property
+    def terms(self) -> list[tuple[str, Term]]:
+        """
+        Link type and term of every link from this word, not yet resolved to words.
+
+        They are recorded in the reverse index as they are found.
+        """
+        terms = list(Template.links(self.etymology_section.strict_wikitext))
+        if lemma := self.redirects_to():
+            terms.append(("redirects_to", Term(self.lang.code, lemma)))
+        if word := self.inflection_of():
+            terms.append(("inflection_of", Term(self.lang.code, word.lemma)))
+
+        for link_type, term in terms:
+            target = canonical(term.lemma, term.lang_code)
+            self.index.add(target, link_type, self.key)
+
+        return terms
+
     @cached_property
     def links(self) -> dict[str, list[Word]]:
+        return self.related()
+
+    def related(self, link_filter: LinkFilter | None = None) -> dict[str, list[Word]]:
+        """
+        Words this word links to, by link type, leaving out the terms
+        rejected by `link_filter` before they are resolved.
+        """
         links: dict[str, list[Word]] = load_json("src/wiketym/data/link_types.json")
 
-        for tpl in Template.parse_all(self.etymology_section.strict_wikitext):
-            if tpl.type in Template.TO_LINK_MAPPING:
-                for term in tpl.terms:
-                    if self.valid_ascendant(w := Word(term.lemma, term.lang_code)):
-                        w.translit = term.tr
-                        w._template_meaning = term.t
-                        links[Template.TO_LINK_MAPPING[tpl.type]].append(w)
+        for link_type, term in self.terms:
+            if link_filter and not link_filter.accepts(link_type, term.lang_code):
+                continue
+            w = Word(term.lemma, term.lang_code)
+            w.translit = term.tr
+            w._template_meaning = term.t
+            links[link_type].append(w)
 
-        if lemma := self.redirects_to():
-            links["redirects_to"] = [Word(lemma, self.lang.code)]
-        if word := self.equivalent_to():
-            links["redirects_to"] = [word]
-        if word := self.accents_stripped_from():
-            links["redirects_to"] = [word]
-        if word := self.inflection_of():
-            links["inflection_of"] = [word]
+        return links
 
+    def descendants(
+        self, link_filter: LinkFilter | None = None
+    ) -> dict[str, list[Word]]:
+        """Words known to link to this word, by link type."""
+        links: dict[str, list[Word]] = load_json("src/wiketym/data/link_types.json")
+        for link_type, keys in self.index.referrers(*self.key).items():
+            links[link_type] = [
+                Word(*key)
+                for key in keys
+                if not link_filter or link_filter.accepts(link_type, key[1])
+            ]
         return links
 
     NODE_STYLES = load_json("src/wiketym/data/styles.json")["nodes"]
@@ -179,9 +209,9 @@ class Word:
     @property
     def node(self):
         text = []
-        text.append(f'<font point-size="10">{self.lang.name}</font>')
-        if self.lemma:
-            text.append(f'<b><font point-size="16">{self.lemma}</font></b>')
+        text.append(f'<font point-size="10">{self.shown_lang.name}</font>')
+        if self.shown_lemma:
+            text.append(f'<b><font point-size="16">{self.shown_lemma}</font></b>')
         if self.translit:
             text.append(f'<b><font point-size="10">{self.translit}</font></b>')
         if self.meaning and self.lang.code != "en":
@@ -192,9 +222,7 @@ class Word:
         node = {}
         node["label"] = "<" + "<br/>".join(text) + ">"
 
-        node[
-            "URL"
-        ] = f'"https://en.wiktionary.org/wiki/{self.page_title}#{self.lang.page_name.replace(" ", "_")}"'
+        node["URL"] = f'"{self.url}"'
 
         node["margin"] = "0.05"
 
@@ -204,6 +232,9 @@ class Word:
         if self.level == 0:
             node |= self.NODE_STYLES["start"]
 
+        if self.frontier:
+            node |= self.NODE_STYLES["frontier"]
+
         node["shape"] = "none"
 
         return node
@@ -255,12 +286,7 @@ class Word:
             < 2
         ):
             print("Nothing to choose from")
-            if (
-                self.redirects_to()
-                or self.equivalent_to()
-                or self.accents_stripped_from()
-                or self.inflection_of()
-            ):
+            if self.redirects_to() or self.inflection_of():
                 self._reference_meaning = (
                     reference.meaning or reference._reference_meaning
                 )
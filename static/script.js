@@ -1,41 +1,3 @@
-// // https://www.w3schools.com/howto/howto_js_filter_dropdown.asp
-
-// function filter(input) {
-//     var filter, ul, li, a, i;
-//     filter = input.value.toUpperCase();
-//     div = input.parentElement;
-//     a = div.getElementsByTagName("a");
-//     for (i = 0; i < a.length; i++) {
-//         txtValue = a[i].textContent || a[i].innerText;
-//         if (txtValue.toUpperCase().indexOf(filter) > -1) {
-//             a[i].style.display = "";
-//         } else {
-//             a[i].style.display = "none";
-//         }
-//     }
-// }
-
-// function setValue(option) {
-//     text = option.textContent || option.innerText;
-//     parent = option.parentElement.parentElement
-//     input = parent.getElementsByTagName("input")[0]
-//     input.value = text
-//     filter(input)
-//     hideDropdown(option)
-// }
-
-// function showDropdown(input) {
-//     filter(input)
-//     parent = input.parentElement
-//     options = parent.getElementsByTagName("div")[0]
-//     options.style.display = ""
-//     options.style.height = "20vh"
-// }
-
-// function hideDropdown(option) {
-//     option.parentElement.style.display = "none"
-// }
-
 function addWord() {
     words = document.getElementById('words');
     wordList = words.children;
@@ -53,7 +15,7 @@ function addWord() {
     language = newWord.querySelector('.language');
     language.querySelector('label')
         .setAttribute('for', 'lang_code' + String(index));
-    language.querySelector('select')
+    language.querySelector('input')
         .setAttribute('name', 'lang_code' + String(index));
 
     words.insertBefore(newWord, document.getElementById('word-buttons'));
@@ -81,3 +43,31 @@ function togglePreview() {
         form.setAttribute('target', '_blank')
     }
 }
+
+function fillOptions(id, options) {
+    datalist = document.getElementById(id)
+    datalist.replaceChildren(...options.map(([value, label]) => {
+        option = document.createElement('option')
+        option.value = value
+        option.textContent = label
+        return option
+    }))
+}
+
+function suggestLanguages(input) {
+    fetch('/api/languages?q=' + encodeURIComponent(input.value))
+        .then(response => response.json())
+        .then(data => fillOptions(
+            'languages', data.languages.map(lang => [lang.code, lang.name])
+        ))
+}
+
+function suggestLemmas(input) {
+    lang = input.closest('.word').querySelector('.language input').value
+    fetch('/api/lemmas?q=' + encodeURIComponent(input.value)
+        + '&lang=' + encodeURIComponent(lang))
+        .then(response => response.json())
+        .then(data => fillOptions(
+            'lemmas', data.lemmas.map(lemma => [lemma.lemma, ''])
+        ))
+}
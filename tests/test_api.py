@@ -0,0 +1,51 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from src.wiketym.wiktionary import api
+from src.wiketym.wiktionary.api import API
+from src.wiketym.wiktionary.stub import StubServer
+
+WIKITEXT = "==English==\n===Etymology===\nFrom {{inh|en|enm|slowword}}.\n"
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    monkeypatch.setattr(API, "_cache", {})
+    monkeypatch.setattr(API, "stats", {"hits": 0, "misses": 0, "coalesced": 0})
+
+
+class TestSingleFlight:
+    def test_coalesced(self, monkeypatch):
+        with StubServer({"slowword": WIKITEXT}, delay=0.3) as stub:
+            monkeypatch.setattr(API, "url", stub.url)
+            with ThreadPoolExecutor(8) as pool:
+                responses = list(
+                    pool.map(lambda _: API._get_sections("slowword"), range(8))
+                )
+            assert len(stub.requests) == 1
+        assert all(response == responses[0] for response in responses)
+        assert API.stats["misses"] == 1
+        assert API.stats["coalesced"] + API.stats["hits"] == 7
+        assert API.stats["coalesced"] > 0
+        assert not API._in_flight
+
+    def test_error(self, monkeypatch):
+        calls = []
+
+        def get(*_):
+            calls.append(1)
+            time.sleep(0.3)
+            raise requests.ConnectionError("down")
+
+        monkeypatch.setattr(api.requests, "get", get)
+        with ThreadPoolExecutor(4) as pool:
+            futures = [pool.submit(API._get_page, "slowword") for _ in range(4)]
+        for future in futures:
+            with pytest.raises(requests.ConnectionError):
+                future.result()
+        assert len(calls) == 1
+        assert "slowword" not in API._cache
+        assert not API._in_flight
@@ -0,0 +1,50 @@
+import pytest
+
+from src.wiketym import crawler
+from src.wiketym.crawler import Crawler
+from src.wiketym.helpers import dump_json, load_json
+from src.wiketym.wiktionary.api import API
+
+from .test_query import ETYMOLOGIES, response
+
+ROOT = ("wiketym test a", "en")
+
+
+@pytest.fixture(autouse=True)
+def pages(monkeypatch):
+    monkeypatch.setattr(API, "_cache", {})
+    monkeypatch.setattr(crawler, "dump_json", lambda *_: None)
+    for title, parents in ETYMOLOGIES.items():
+        API._cache[f"wiketym test {title}"] = response(title, parents)
+
+
+class TestCrawler:
+    def test_depth(self):
+        report = Crawler([ROOT], depth=1).run()
+        assert report["expanded"] == 4  # a, b, c, d
+        assert report["coverage"] == 1
+
+    def test_resume(self, monkeypatch, tmp_path):
+        state = str(tmp_path / "crawl.json")
+        monkeypatch.setattr(
+            crawler,
+            "dump_json",
+            lambda path, obj: path == state and dump_json(path, obj),
+        )
+
+        first = Crawler([ROOT], depth=3, state_path=state)
+        expand = first._expand
+        calls = iter(range(3))
+
+        def interrupted(*args):
+            next(calls)
+            expand(*args)
+
+        monkeypatch.setattr(first, "_expand", interrupted)
+        with pytest.raises(StopIteration):
+            first.run()
+        assert len(load_json(state)["done"]) == 3
+
+        report = Crawler([ROOT], depth=3, state_path=state).run()
+        assert report["expanded"] == len(ETYMOLOGIES)
+        assert report["pending"] == 0
@@ -0,0 +1,23 @@
+from src.wiketym.graph_core import GraphCore
+
+
+class TestGraphCore:
+    def test_cycles(self):
+        core = GraphCore()
+        assert core.link("a", "b", "inherited_from")
+        assert core.link("b", "c", "borrowed_from")
+        assert not core.link("c", "a", "inherited_from")
+        assert not core.link("c", "c", "inherited_from")
+        assert core.link("a", "b", "derived_from")  # only changes the type
+        assert len(core) == 3
+        assert core.edges == 2
+
+    def test_reachable(self):
+        core = GraphCore()
+        for u, v in ["ab", "bc", "db"]:
+            core.link(u, v, "inherited_from")
+        a, b, c, d = (core.ids[word] for word in "abcd")
+        assert core.reachable([b]) == {b, c}
+        assert core.reachable([b], reverse=True) == {a, b, d}
+        core.link("c", "e", "inherited_from")
+        assert core.reachable([core.ids["e"]], reverse=True) == {a, b, c, d, 4}
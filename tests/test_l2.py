@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from src.wiketym.wiktionary.api import API
+from src.wiketym.wiktionary.l2 import CircuitBreaker, L2Cache, L2Server
+from src.wiketym.wiktionary.stub import StubServer, parse_response
+
+WIKITEXT = "==English==\n===Etymology===\nFrom {{inh|en|enm|sharedword}}.\n"
+
+
+@pytest.fixture
+def server():
+    with L2Server() as server:
+        yield server
+
+
+class TestL2Cache:
+    def test_roundtrip(self, server):
+        cache = L2Cache.from_url(server.url, ttl=60)
+        response = parse_response("sharedword", WIKITEXT * 100)
+        cache.set("sharedword#1", response)
+        assert cache.get("sharedword#1") == response
+        assert cache.get("sharedword#2") is None
+        ((flags, _, data),) = server.values.values()
+        assert flags == L2Cache.COMPRESSED
+        assert len(data) < len(json.dumps(response)) / 10
+
+        server.values = {key: (flags, 0, data) for key in server.values}  # expired
+        assert cache.get("sharedword#1") is None
+        assert cache.stats == {"hits": 1, "misses": 2, "errors": 0, "skipped": 0}
+
+    def test_circuit_breaker(self, server):
+        cache = L2Cache.from_url(server.url, breaker=CircuitBreaker(2, cooldown=60))
+        server.stop()
+        for _ in range(4):
+            assert cache.get("sharedword") is None
+        assert cache.stats["errors"] == 2
+        assert cache.stats["skipped"] == 2
+        assert cache.breaker.state == "open"
+
+
+class TestAPI:
+    def test_shared(self, monkeypatch, server):
+        monkeypatch.setattr(API, "_cache", {})
+        monkeypatch.setattr(API, "l2", L2Cache.from_url(server.url))
+        with StubServer({"sharedword": WIKITEXT}) as stub:
+            monkeypatch.setattr(API, "url", stub.url)
+            sections = API._get_sections("sharedword")
+            assert len(stub.requests) == 1
+
+            monkeypatch.setattr(API, "_cache", {})  # another host
+            assert API._get_sections("sharedword") == sections
+            assert len(stub.requests) == 1
+
+            server.stop()
+            monkeypatch.setattr(API, "_cache", {})
+            assert API._get_sections("sharedword") == sections
+            assert len(stub.requests) == 2
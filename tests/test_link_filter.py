@@ -0,0 +1,27 @@
+from src.wiketym.link_filter import LinkFilter
+
+
+class TestLinkFilter:
+    def test_link_types(self):
+        link_filter = LinkFilter(link_types={"inherited_from"})
+        assert link_filter.accepts("inherited_from", "la")
+        assert not link_filter.accepts("mentioned", "la")
+
+    def test_languages(self):
+        link_filter = LinkFilter(languages={"la", "gem"})
+        assert link_filter.accepts("inherited_from", "la")
+        assert link_filter.accepts("inherited_from", "gem-pro")
+        assert not link_filter.accepts("inherited_from", "grc")
+
+    def test_reconstructed(self):
+        assert LinkFilter(reconstructed=True).accepts("derived_from", "ine-pro")
+        assert not LinkFilter(reconstructed=True).accepts("derived_from", "la")
+        assert LinkFilter(reconstructed=False).accepts("derived_from", "la")
+
+    def test_same_word(self):
+        link_filter = LinkFilter(languages={"la"}, reconstructed=True)
+        assert link_filter.accepts("redirects_to", "en")
+        assert link_filter.accepts("inflection_of", "en")
+        assert not link_filter.accepts("inherited_from", "en")
+        link_filter = LinkFilter(link_types={"inherited_from"})
+        assert not link_filter.accepts("redirects_to", "la")
@@ -0,0 +1,24 @@
+from src.wiketym.link_index import LinkIndex
+
+
+class TestLinkIndex:
+    def test_referrers(self):
+        index = LinkIndex()
+        index.add(("aqua", "la"), "inherited_from", ("apă", "ro"))
+        index.add(("aqua", "la"), "inherited_from", ("acqua", "it"))
+        index.add(("aqua", "la"), "borrowed_from", ("aquarium", "en"))
+        referrers = index.referrers("aqua", "la")
+        assert list(referrers["inherited_from"]) == [("apă", "ro"), ("acqua", "it")]
+        assert list(referrers["borrowed_from"]) == [("aquarium", "en")]
+
+    def test_missing(self):
+        assert not LinkIndex().referrers("aqua", "la")
+
+    def test_discard(self):
+        index = LinkIndex()
+        index.add(("aqua", "la"), "inherited_from", ("apă", "ro"))
+        index.add(("aqua", "la"), "inherited_from", ("acqua", "it"))
+        index.discard(("apă", "ro"))
+        assert list(index.referrers("aqua", "la")["inherited_from"]) == [
+            ("acqua", "it")
+        ]
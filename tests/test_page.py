@@ -1,4 +1,4 @@
-from src.wiketym.wiktionary import Page, Section, Language
+from src.wiketym.wiktionary import Page, Section, Language, api
 
 
 class TestPage:
@@ -28,3 +28,9 @@ class TestPage:
     def test_subsections(self):
         lang_section = Page("vită")["ro"]
         assert len([s for s in lang_section["Noun"]]) == 3
+
+    def test_scoped(self):
+        p = Page("sol")
+        assert "==Romanian==" in p["ro"].wikitext
+        assert "==Latin==" not in p["ro"].wikitext
+        assert p.size < len(api.get_page("sol")["wikitext"]["*"].encode("utf-8"))
@@ -0,0 +1,37 @@
+from src.wiketym.prefix_index import LanguageIndex, LemmaIndex, PrefixIndex
+from src.wiketym.wiktionary.api import API
+from src.wiketym.wiktionary.response_cache import ResponseCache
+
+
+def page(*languages):
+    sections = [{"toclevel": 1, "line": language} for language in languages]
+    return {"parse": {"sections": sections}}
+
+
+class TestPrefixIndex:
+    def test_search(self):
+        index = PrefixIndex([("vită", 1), ("vite", 2), ("vitamin", 3), ("apă", 4)])
+        assert index.search("VIT") == [1, 2, 3]
+        assert index.search("vit", limit=1) == [1]
+        assert index.search("x") == []
+
+    def test_languages(self):
+        index = LanguageIndex()
+        assert "la" in index.search("lati")
+        assert "ang" in index.search("english", limit=50)  # Old English
+
+    def test_lemmas(self, monkeypatch):
+        monkeypatch.setattr(API, "_cache", ResponseCache(None, max_size=1 << 20))
+        API._cache["vită"] = page("Romanian")
+        index = LemmaIndex()
+        index.build()
+        assert index.lemmas("vit", "ro") == [("vită", "ro")]
+        API._cache["vita#sections"] = page("Latin", "Italian")
+        API._cache["vita#2"] = {}
+        assert index.lemmas("vit", "la") == [("vita", "la")]
+        assert len(index.lemmas("vit")) == 3
+        assert index.lemmas("vit", "en") == []
+        API._cache["vita#sections"] = page("Latin")
+        assert len(index.lemmas("vit")) == 2
+        del API._cache["vită"]
+        assert index.lemmas("vit") == [("vita", "la")]
@@ -0,0 +1,211 @@
+import json
+
+import pytest
+
+from src.wiketym.etygraph import Group
+from src.wiketym.query import Query
+from src.wiketym.word import Word
+from src.wiketym.wiktionary import Page
+from src.wiketym.wiktionary.api import API
+from src.wiketym.wiktionary.stub import StubServer
+
+# a: b, c, d <- b: e, f <- e: g
+ETYMOLOGIES = {
+    "a": ["b", "c", "d"],
+    "b": ["e", "f"],
+    "c": [],
+    "d": [],
+    "e": ["g"],
+    "f": [],
+    "g": [],
+}
+
+
+def response(title, parents):
+    etymology = ", ".join(
+        f"{{{{{p}}}}}" if "|" in p else f"{{{{inh|en|en|wiketym test {p}}}}}"
+        for p in parents
+    )
+    wikitext = f"==English==\n===Etymology===\n{etymology}\n===Noun===\n# {title}\n"
+    offsets = [0, wikitext.index("===Etymology"), wikitext.index("===Noun")]
+    lines = ["English", "Etymology", "Noun"]
+    return {
+        "parse": {
+            "wikitext": {"*": wikitext},
+            "sections": [
+                {
+                    "toclevel": 1 if i == 0 else 2,
+                    "line": lines[i],
+                    "number": "1" if i == 0 else f"1.{i}",
+                    "index": str(i + 1),
+                    "byteoffset": offsets[i],
+                }
+                for i in range(3)
+            ],
+        }
+    }
+
+
+def edges(q: Query) -> set:
+    return {(u.lemma, v.lemma) for u, v in q.G.edges}
+
+
+@pytest.fixture(autouse=True)
+def pages(monkeypatch):
+    monkeypatch.setattr(API, "_cache", {})
+    for title, parents in ETYMOLOGIES.items():
+        API._cache[f"wiketym test {title}"] = response(title, parents)
+
+
+def run(**kwargs) -> Query:
+    Word.clear()
+    start = Word("wiketym test a", "en")
+    return Query([start], render=False, disambiguate=False, **kwargs)
+
+
+class TestQuery:
+    def test_full(self):
+        assert len(edges(run())) == 6
+
+    def test_max_level(self):
+        q = run(max_level=1)
+        assert len(edges(q)) == 3
+        assert {w.lemma for w in q.frontier} == set()
+
+    def test_resume_deeper(self):
+        assert edges(run(max_level=1).resume(max_level=3, render=False)) == edges(
+            run(max_level=3)
+        )
+
+    def test_resume_wider(self):
+        q = run(max_count=1)
+        assert len(edges(q)) == 3
+        assert edges(q.resume(max_count=2, render=False)) == edges(run(max_count=2))
+
+    def test_max_nodes(self):
+        q = run(max_nodes=3)
+        assert len(q.G) == 3
+        assert q.exhausted == "max_nodes"
+        assert q.frontier
+        assert edges(q.resume(max_nodes=None, render=False)) == edges(run())
+
+    def test_max_level_shortest_path(self):
+        # sa: sb, sd <- sb: sc <- sc: se <- sd: se (borrowed) <- se: sz
+        pages = {"sa": ["sb", "bor|en|en|wiketym test sd"], "sb": ["sc"]}
+        pages |= {"sc": ["se"], "sd": ["bor|en|en|wiketym test se"]}
+        pages |= {"se": ["sz"], "sz": []}
+        for title, parents in pages.items():
+            API._cache[f"wiketym test {title}"] = response(title, parents)
+        Word.clear()
+        start = Word("wiketym test sa", "en")
+        q = Query([start], render=False, disambiguate=False, max_level=3)
+        assert "wiketym test sz" in {w.lemma for w in q.G}  # se is 2 away via sd
+
+    def test_max_fetches(self, monkeypatch):
+        monkeypatch.setattr(API, "_cache", {})
+        for title in ETYMOLOGIES:
+            Page.registry.discard(f"wiketym test {title}")
+        pages = {
+            f"wiketym test {title}": response(title, parents)["parse"]["wikitext"]["*"]
+            for title, parents in ETYMOLOGIES.items()
+        }
+        with StubServer(pages) as stub:
+            monkeypatch.setattr(API, "url", stub.url)
+            q = run(max_fetches=2)
+        assert q.exhausted == "max_fetches"
+        assert len(q.G) < len(ETYMOLOGIES)
+        assert q.frontier and all(word.frontier for word in q.frontier)
+
+    def test_deadline(self):
+        q = run(deadline=0)
+        assert q.exhausted == "deadline"
+        assert [w.lemma for w in q.G] == ["wiketym test a"]
+        assert {w.lemma for w in q.frontier} == {"wiketym test a"}
+        assert all(word.frontier for word in q.frontier)
+
+    def test_resume_other_options(self):
+        with pytest.raises(ValueError):
+            run(max_level=1).resume(reduce=False)
+
+    @pytest.mark.parametrize(
+        "options, template",
+        [
+            ({"allowed_links": Query.ALL_LINKS - Query.WEAK_LINKS}, "m|en|unseen"),
+            ({"languages": {"en", "gem"}}, "inh|en|la|unseen"),
+            ({"reconstructed": False}, "inh|en|gem-pro|*unseen"),
+        ],
+    )
+    def test_filters_before_fetching(self, options, template):
+        API._cache["wiketym test filtered"] = response("filtered", ["b", template])
+        Word.clear()
+        misses = API.stats["misses"]
+        start = Word("wiketym test filtered", "en")
+        q = Query([start], render=False, disambiguate=False, max_level=1, **options)
+        assert API.stats["misses"] == misses
+        assert {w.lemma for w in q.G} == {"wiketym test filtered", "wiketym test b"}
+
+    def test_connect(self):
+        # x: m, p <- y: m <- m: n
+        pages = {"x": ["m", "p"], "y": ["m"], "m": ["n"], "n": [], "p": []}
+        for title, parents in pages.items():
+            API._cache[f"wiketym test {title}"] = response(title, parents)
+        Word.clear()
+        start = [Word("wiketym test x", "en"), Word("wiketym test y", "en")]
+        q = Query(start, render=False, disambiguate=False, connect=True)
+        assert {w.lemma[len("wiketym test ") :] for w in q.G} == {"x", "y", "m"}
+        assert Word("wiketym test m", "en") not in q.handled_words
+
+    def test_summarize(self):
+        q = run(summarize=6)
+        assert len(q.G) == 6  # e collapsed between b and g
+        assert ("wiketym test g", "wiketym test b") in edges(q)
+        assert sum(skipped for *_, skipped in q.G.edges(data="skipped", default=0)) == 1
+        q = run(summarize=2)
+        (group,) = [node for node in q.G if isinstance(node, Group)]
+        assert len(group.lemmas) == 5  # b, c, d, f, g; e was collapsed
+        assert [(u, v.lemma) for u, v in q.G.edges] == [(group, "wiketym test a")]
+        assert '"group"' in q.G.to_json()
+
+    def test_summarize_weak_leaves(self):
+        mentions = [f"m|en|wiketym test {title}" for title in "cdf"]
+        API._cache["wiketym test weak"] = response("weak", mentions)
+        Word.clear()
+        start = Word("wiketym test weak", "en")
+        q = Query([start], render=False, disambiguate=False, summarize=2)
+        assert [node.label for node in q.G if isinstance(node, Group)] == [
+            "3 words mentioned"
+        ]
+
+    def test_relaxes(self):
+        q = run(max_level=2, max_fetches=3, deadline=None)
+        assert not q.relaxes(max_level=2, max_fetches=3, deadline=None)
+        assert not q.relaxes(max_level=1, max_fetches=2, deadline=5)
+        assert q.relaxes(max_level=3)
+        assert q.relaxes(max_fetches=4)
+        assert q.relaxes(max_fetches=None)
+
+    def test_to_json(self):
+        API._cache["wiketym test r"] = {
+            "parse": {"wikitext": {"*": "#REDIRECT [[wiketym test a]]"}, "sections": []}
+        }
+        Word.clear()
+        start = Word("wiketym test r", "en")
+        q = Query([start], render=False, disambiguate=False, max_level=2)
+        graph = json.loads(q.G.to_json())
+        assert graph["styles"]["edges"]["redirects_to"]["arrowhead"] == "onormal"
+        assert "frontier" in graph["styles"]["nodes"]
+        nodes = [node["lemma"] for node in graph["nodes"]]
+        assert sorted(nodes) == [f"wiketym test {x}" for x in "bcdr"]
+        merged = graph["nodes"][nodes.index("wiketym test r")]  # shown for a
+        assert merged == {
+            "lemma": "wiketym test r",
+            "lang": "en",
+            "language": "English",
+            "translit": "",
+            "meaning": "a",
+            "url": "https://en.wiktionary.org/wiki/wiketym test r#English",
+            "styles": ["start"],
+        }
+        assert sorted(
+            (nodes[u], nodes[v], link_type) for u, v, link_type in graph["edges"]
+        ) == [(f"wiketym test {x}", "wiketym test r", "inherited_from") for x in "bcd"]
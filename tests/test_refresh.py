@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from src.wiketym.refresh import refresh, stale, sync
+from src.wiketym.word import Word
+from src.wiketym.wiktionary import Page
+from src.wiketym.wiktionary.api import API
+from src.wiketym.wiktionary.response_cache import ResponseCache, ResponseStore
+from src.wiketym.wiktionary.stub import StubServer
+
+PAGES = {
+    "refresh a": "==English==\n===Etymology===\nFrom {{inh|en|enm|refresh b}}.\n",
+    "refresh b": "==Middle English==\n===Etymology===\nUnknown.\n",
+}
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setattr(API, "_cache", {})
+    for title in PAGES:
+        Page.registry.discard(title)
+    Word.clear()
+    with StubServer(PAGES) as stub:
+        monkeypatch.setattr(API, "url", stub.url)
+        yield stub
+
+
+class TestRefresh:
+    def test_revisions(self, stub):
+        assert Word("refresh a", "en").links["inherited_from"]
+        API._get_sections("refresh b")
+        assert all(response["fetched"] for response in API._cache.values())
+        assert stale() == []
+
+        stub.edit("refresh a", "==English==\n===Etymology===\nUnknown.\n")
+        assert stale() == ["refresh a"]
+        assert Word.index.referrers("refresh b", "enm")["inherited_from"]
+
+        requests = len(stub.requests)
+        assert refresh(["refresh a"]) == 2  # its sections and English section
+        assert [params["page"] for params in stub.requests[requests:]] == [
+            "refresh a",
+            "refresh a",
+        ]
+        assert not Word.index.referrers("refresh b", "enm")["inherited_from"]
+        assert not Word("refresh a", "en").links["inherited_from"]
+        assert stale() == []
+
+    def test_recent_changes(self, stub):
+        for title in PAGES:
+            API._get_sections(title)
+        stub.edit("refresh b", "==Middle English==\n===Etymology===\nKnown.\n")
+        stub.edit("refresh c", "==English==\n")  # not cached
+        assert stale(since=time.time() - 60) == ["refresh b"]
+        assert stale(since=time.time() + 60) == []
+
+    def test_sync(self, stub, monkeypatch, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        worker = ResponseCache(ResponseStore(path), max_size=1 << 20)
+        monkeypatch.setattr(API, "_cache", worker)
+        assert Word("refresh a", "en").links["inherited_from"]
+        assert sync() == []
+
+        stub.edit("refresh a", "==English==\n===Etymology===\nUnknown.\n")
+        job = ResponseCache(ResponseStore(path), max_size=1 << 20)
+        monkeypatch.setattr(API, "_cache", job)
+        refresh(["refresh a"])
+
+        monkeypatch.setattr(API, "_cache", worker)
+        assert Word("refresh a", "en").links["inherited_from"]  # still in memory
+        assert sync() == ["refresh a"]
+        assert not Word("refresh a", "en").links["inherited_from"]
+        assert sync() == []
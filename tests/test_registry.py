@@ -0,0 +1,43 @@
+from src.wiketym.wiktionary.registry import Registry
+
+
+class Sized:
+    def __init__(self, size):
+        self.size = size
+
+
+class TestRegistry:
+    def test_lru_eviction(self):
+        reg = Registry(max_size=10)
+        for key in "abc":
+            reg.add(key, Sized(4))
+        assert len(reg) == 2
+        assert reg.size == 8
+        assert reg.get("a") is None
+
+    def test_recently_used_kept(self):
+        reg = Registry(max_size=10)
+        reg.add("a", Sized(4))
+        reg.add("b", Sized(4))
+        reg.get("a")
+        reg.add("c", Sized(4))
+        assert reg.get("a") is not None
+        assert reg.get("b") is None
+
+    def test_live_objects_not_lost(self):
+        reg = Registry(max_size=10)
+        in_use = Sized(8)
+        reg.add("a", in_use)
+        reg.add("b", Sized(8))
+        assert len(reg) == 1
+        assert reg.size == 8 and reg.live_size == 16
+        assert reg.get("a") is in_use
+        assert reg.live == 1
+
+    def test_resize(self):
+        reg = Registry(max_size=10)
+        obj = Sized(2)
+        reg.add("a", obj)
+        obj.size = 5
+        reg.resize("a")
+        assert reg.size == 5
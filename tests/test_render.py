@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+from src.wiketym.render import Renderer, RenderError, RenderSlots
+
+
+class TestRenderer:
+    def test_commands(self):
+        renderer = Renderer(unflatten_limit=(10, 20), dot_limit=(100, 200))
+        assert [c[0] for c in renderer.commands(5, 5, "x.pdf")] == ["unflatten", "dot"]
+        assert [c[0] for c in renderer.commands(50, 5, "x.pdf")] == ["dot"]
+        assert [c[0] for c in renderer.commands(50, 500, "x.pdf")] == ["sfdp"]
+
+    def test_timeout(self):
+        renderer = Renderer()
+        with pytest.raises(RenderError):
+            renderer._run(["sleep", "5"], "", time.monotonic() + 0.1)
+        assert renderer.stats()["timeouts"] == 1
+
+    def test_timeout_per_render(self, tmp_path):
+        renderer = Renderer(timeout=0.5)
+        renderer.commands = lambda *_: [["sleep", "0.3"], ["sleep", "0.3"]]
+        with pytest.raises(RenderError):
+            renderer.render("", str(tmp_path / "x.pdf"), 0, 0)
+        assert renderer.stats()["timeouts"] == 1
+
+    def test_slots(self, tmp_path):
+        slots = RenderSlots(1, str(tmp_path))
+        with slots.hold(time.monotonic()):
+            with pytest.raises(RenderError):
+                with RenderSlots(1, str(tmp_path)).hold(time.monotonic() + 0.1):
+                    pass
+        with slots.hold(time.monotonic()):
+            pass
+
+    def test_failure(self, tmp_path):
+        renderer = Renderer()
+        renderer.commands = lambda *_: [["false"]]
+        with pytest.raises(RenderError):
+            renderer.render("digraph {}", str(tmp_path / "x.pdf"), 0, 0)
+        stats = renderer.stats()
+        assert stats["failed"] == 1
+        assert stats["queued"] == stats["running"] == 0
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from src.wiketym.wiktionary.response_cache import ResponseCache, ResponseStore
+
+
+def response(text):
+    return {"parse": {"wikitext": {"*": text}}, "fetched": 1}
+
+
+def size(response):
+    return len(json.dumps(response, ensure_ascii=False).encode("utf-8"))
+
+
+class TestResponseCache:
+    def test_evicts_by_size(self):
+        cache = ResponseCache(None, max_size=2 * size(response("aaa")))
+        cache["a"] = response("aaa")
+        cache["b"] = response("bbb")
+        cache["a"]  # most recently used
+        cache["c"] = response("ccc")
+        assert list(cache) == ["a", "c"]
+        assert cache.size == 2 * size(response("aaa"))
+        with pytest.raises(KeyError):
+            cache["b"]
+
+    def test_reads_back_from_store(self, tmp_path):
+        store = ResponseStore(str(tmp_path / "cache.sqlite"))
+        cache = ResponseCache(store, max_size=size(response("aaa")))
+        cache["a"] = response("aaa")
+        cache["b"] = response("bbb")
+        assert cache.in_memory() == {"b": response("bbb")}
+        assert cache["a"] == response("aaa")
+        assert list(cache.in_memory()) == ["a"]
+        assert len(cache) == 2 and "b" in cache
+
+    def test_shared_store(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        cache = ResponseCache(ResponseStore(path), max_size=1 << 20)
+        other = ResponseCache(ResponseStore(path), max_size=1 << 20)
+        changes = []
+        other.listeners.append(lambda key, response: changes.append((key, response)))
+        cache["a"] = response("aaa")
+        assert other["a"] == response("aaa")
+        cache["a"] = response("new")
+        assert cache.updates() == []  # its own write
+        assert other.updates() == ["a"]
+        assert changes == [("a", response("new"))]
+        assert other.in_memory() == {}
+        assert other["a"] == response("new")
+        assert other.updates() == []
+        del cache["a"]
+        assert "a" not in other.store
@@ -0,0 +1,51 @@
+from src.wiketym.wiktionary.api import API
+from src.wiketym.wiktionary.stub import StubServer
+
+WIKITEXT = (
+    "==English==\n===Etymology===\nFrom {{inh|en|enm|stubword}}.\n"
+    "==Latin==\n===Etymology===\nUnknown.\n"
+)
+
+
+class TestStub:
+    def test_respond(self):
+        stub = StubServer({"stubword": WIKITEXT})
+        response = stub.respond({"page": "stubword", "prop": "sections"})
+        assert [s["line"] for s in response["parse"]["sections"]] == [
+            "English",
+            "Etymology",
+            "Latin",
+            "Etymology",
+        ]
+        assert "wikitext" not in response["parse"]
+        section = stub.respond({"page": "stubword", "prop": "wikitext", "section": 3})
+        assert section["parse"]["wikitext"]["*"].startswith("==Latin==")
+        assert "error" in stub.respond({"page": "missing"})
+
+    def test_api(self, monkeypatch):
+        monkeypatch.setattr(API, "_cache", {})
+        with StubServer({"stubword": WIKITEXT}) as stub:
+            monkeypatch.setattr(API, "url", stub.url)
+            assert len(API._get_sections("stubword")["sections"]) == 4
+            assert API._get_section("stubword", 1).startswith("==English==")
+            assert [params["prop"] for params in stub.requests] == [
+                "sections|revid",
+                "wikitext|revid",
+            ]
+
+    def test_revisions(self):
+        stub = StubServer({"stubword": WIKITEXT})
+        stub.edit("stubword", WIKITEXT + "==French==\n")
+        response = stub.respond(
+            {"action": "query", "prop": "revisions", "titles": "stubword|missing"}
+        )
+        assert response["query"]["pages"] == [
+            {"title": "stubword", "revisions": [{"revid": 2}]},
+            {"title": "missing", "missing": True},
+        ]
+        stub.edit("other", "")
+        changes = stub.respond(
+            {"action": "query", "list": "recentchanges", "rclimit": 1}
+        )
+        assert changes["query"]["recentchanges"][0]["title"] == "other"
+        assert changes["continue"]["rccontinue"] == "1"
@@ -0,0 +1,33 @@
+import json
+import time
+
+from src.wiketym.trace import Tracer, span
+
+
+class TestTrace:
+    def test_inactive(self):
+        with span("nothing", a=1) as args:
+            args["b"] = 2
+        assert args == {"a": 1, "b": 2}
+
+    def test_spans(self):
+        tracer = Tracer()
+        with tracer.active():
+            with span("outer"):
+                with span("inner", size=1) as args:
+                    args["cached"] = True
+        with span("after"):
+            pass
+        events = json.loads(tracer.to_json())["traceEvents"]
+        assert [e["name"] for e in events] == ["inner", "outer"]
+        assert events[0]["args"] == {"size": 1, "cached": True}
+        assert events[1]["ts"] <= events[0]["ts"]
+        assert events[1]["dur"] >= events[0]["dur"]
+
+    def test_profile(self):
+        tracer = Tracer(sample_interval=0.001)
+        with tracer.active():
+            time.sleep(0.05)
+        events = json.loads(tracer.to_json())["traceEvents"]
+        samples = [e for e in events if e.get("cat") == "sample"]
+        assert any(e["name"].startswith("test_profile") for e in samples)
@@ -0,0 +1,78 @@
+import pytest
+
+from src.wiketym.word import Word
+from src.wiketym.wiktionary.api import API
+
+TITLE = "wiketym test word"
+WIKITEXT = (
+    "==English==\n"
+    "===Etymology===\n"
+    + ", ".join(f"{{{{inh|en|enm|wiketym test term {i}}}}}" for i in range(12))
+    + "\n===Noun===\n# test\n"
+)
+RESPONSE = {
+    "parse": {
+        "title": TITLE,
+        "wikitext": {"*": WIKITEXT},
+        "sections": [
+            {
+                "toclevel": 1,
+                "line": "English",
+                "number": "1",
+                "index": "1",
+                "byteoffset": 0,
+            },
+            {
+                "toclevel": 2,
+                "line": "Etymology",
+                "number": "1.1",
+                "index": "2",
+                "byteoffset": WIKITEXT.index("===Etymology"),
+            },
+            {
+                "toclevel": 2,
+                "line": "Noun",
+                "number": "1.2",
+                "index": "3",
+                "byteoffset": WIKITEXT.index("===Noun"),
+            },
+        ],
+    }
+}
+
+
+class TestWord:
+    @pytest.fixture(autouse=True)
+    def page(self, monkeypatch):
+        monkeypatch.setattr(API, "_cache", {TITLE: RESPONSE})
+        Word.clear()
+
+    def test_duplicates(self):
+        assert Word(TITLE, "en") is Word(TITLE, "en")
+
+    def test_lazy(self):
+        stats = dict(API.stats)
+        word = Word("wiketym test other", "en")
+        assert word.lemma == "wiketym test other"
+        assert API.stats == stats
+
+    def test_links_fetch_count(self):
+        word = Word(TITLE, "en")
+        assert word.meaning == "test"
+        misses = API.stats["misses"]
+        terms = word.links["inherited_from"]
+        assert len(terms) == 12
+        assert API.stats["misses"] == misses
+        assert not any("page" in term.__dict__ for term in terms)
+
+    def test_canonical(self):
+        word = Word("vīta", "la")
+        assert word is Word("vita", "la")
+        assert word is Word("vīta", "la-vul")
+        assert word.key == ("vita", "la")
+        assert (word.shown_lemma, word.shown_lang.code) == ("vīta", "la")
+        assert Word("wódr̥", "ine-pro") is Word("*wódr̥", "ine-pro")
+        assert Word("Reconstruction:Proto-Indo-European/wódr̥", "ine-pro").key == (
+            "*wódr̥",
+            "ine-pro",
+        )
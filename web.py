@@ -1,52 +1,266 @@
-from flask import Flask, request, render_template, send_file
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import Flask, abort, request, render_template, send_file
+from werkzeug.exceptions import HTTPException
 from src.wiketym.wiktionary.language import Language
+from src.wiketym.prefix_index import LanguageIndex, lemma_index
 from src.wiketym.query import Query
+from src.wiketym.refresh import sync
+from src.wiketym.render import RenderError, renderer
+from src.wiketym.trace import Tracer, span
+from src.wiketym.warm import warm_up
 from src.wiketym.word import Word
+from src.wiketym.wiktionary import Page
+from src.wiketym.wiktionary.api import API
+from src.wiketym.wiktionary.registry import Registry
 
 app = Flask(__name__)
 
 PREF_LANGS = ["en", "ro", "de", "la", "fr", "es"]
+PREF_LANGUAGES = [
+    {"code": code, "name": Language.lang_data[code]["name"]} for code in PREF_LANGS
+]
+"""Languages suggested before anything is typed."""
+
+language_index = LanguageIndex()
+MAX_RESULTS = 50
+"""Maximum number of suggestions returned by the search endpoints."""
+
+MAX_FETCHES = 500
+"""Default limit of pages requested from Wiktionary per query."""
+MAX_NODES = 200
+"""Default limit of words per graph."""
+DEADLINE = 20
+"""Default limit of seconds spent expanding a graph."""
+SUMMARIZE = 150
+"""Default number of words beyond which a graph is summarized, 0 for never."""
+
+queries = Registry(max_size=2000)
+"""Recent queries, bounded by their number of words, to be resumed."""
+GROWING = Query.BUDGETS & {"max_level", "max_count"}
+"""Budgets of a query which must not shrink for it to be resumed."""
+
+REQUEST_LOG = os.environ.get("WIKETYM_REQUEST_LOG")
+"""JSONL file to append the parameters and timing of each query to, if set."""
+_log_lock = threading.Lock()
+
+
+def normalized_args() -> dict[str, str]:
+    """Request arguments with the words numbered from 1 and the rest sorted."""
+    args = {}
+    lemmas = [v for k, v in request.args.items() if k.startswith("lemma")]
+    lang_codes = [v for k, v in request.args.items() if k.startswith("lang_code")]
+    words = [(lemma, code) for lemma, code in zip(lemmas, lang_codes) if lemma]
+    for i, (lemma, lang_code) in enumerate(words, start=1):
+        args[f"lemma{i}"] = lemma
+        args[f"lang_code{i}"] = lang_code
+    for key, value in sorted(request.args.items()):
+        if not key.startswith(("lemma", "lang_code")):
+            args[key] = value
+    return args
+
+
+def logged(view):
+    """Append each call of `view` to the request log."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not REQUEST_LOG:
+            return view(*args, **kwargs)
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = app.make_response(view(*args, **kwargs))
+            status = response.status_code
+            return response
+        except HTTPException as exc:
+            status = exc.code
+            raise
+        except RenderError:
+            status = 503
+            raise
+        finally:
+            entry = {
+                "time": time.time(),
+                "path": request.path,
+                "args": normalized_args(),
+                "status": status,
+                "duration": time.perf_counter() - start,
+            }
+            with _log_lock, open(REQUEST_LOG, "a", encoding="utf-8") as file:
+                file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    return wrapper
+
+
+def traceable(view):
+    """
+    Let `view` answer with the Chrome trace of its work instead,
+    when asked for with `trace=1` (`trace=profile` to also sample stacks)
+    or the `X-Wiketym-Trace` header.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        mode = request.args.get("trace") or request.headers.get("X-Wiketym-Trace")
+        if not mode:
+            return view(*args, **kwargs)
+        tracer = Tracer(sample_interval=0.005 if mode == "profile" else None)
+        with tracer.active(), span(request.path, args=dict(request.args)):
+            response = app.make_response(view(*args, **kwargs))
+            with span("respond"):
+                response.get_data()
+        return app.response_class(
+            tracer.to_json(),
+            mimetype="application/json",
+            headers={"Content-Disposition": "attachment; filename=trace.json"},
+        )
+
+    return wrapper
 
 
 @app.route("/")
 def my_form():
-    return render_template(
-        "request.html",
-        languages=[
-            {"code": lang_code, "name": lang_object.name}
-            for lang_code, lang_object in {
-                code: Language(code) for code in PREF_LANGS
-            }.items()
+    return render_template("request.html", languages=PREF_LANGUAGES)
+
+
+def limit() -> int:
+    return max(0, min(request.args.get("limit", 10, type=int), MAX_RESULTS))
+
+
+@app.route("/api/languages", methods=["GET"])
+def api_languages():
+    codes = language_index.search(request.args.get("q", ""), limit())
+    return {
+        "languages": [
+            {"code": code, "name": Language.lang_data[code]["name"]} for code in codes
         ]
-        + [
-            {"code": lang_code, "name": lang_object["name"]}
-            for lang_code, lang_object in Language.lang_data.items()
-            if len(lang_code) < 3 and lang_code not in PREF_LANGS
-        ],
+    }
+
+
+@app.route("/api/lemmas", methods=["GET"])
+def api_lemmas():
+    lemmas = lemma_index.lemmas(
+        request.args.get("q", ""), request.args.get("lang", ""), limit()
     )
+    return {"lemmas": [{"lemma": lemma, "lang": code} for lemma, code in lemmas]}
 
 
-@app.route("/generate", methods=["GET"])
-def generate():
+def lang_code(value: str) -> str:
+    """Code of a language given by its code or name, aborting if there is none."""
+    if value in Language.lang_data:
+        return value
+    if (code := Language.codes.get(value.strip())) is not None:
+        return code
+    abort(400, f"Unknown language: {value}")
+
+
+def pdf(q: Query) -> str:
+    """Path of the rendered graph of a query."""
+    return f"outputs/{q.filename}.pdf"
+
+
+def query(**kwargs) -> Query:
+    """
+    Run the query described by the request arguments,
+    or resume the same query made earlier with smaller budgets.
+    The same query with the same budgets is answered as it was.
 
+    Pages refreshed since the last query are parsed again,
+    and queries made before, which may hold their words, are forgotten.
+    """
+    if sync():
+        queries.clear()
     lemmas = [v for k, v in request.args.items() if k.startswith("lemma")]
     lang_codes = [v for k, v in request.args.items() if k.startswith("lang_code")]
 
-    word_list = [
-        Word(lemmas[i], lang_codes[i]) for i in range(len(lemmas)) if lemmas[i]
-    ]
-    q = Query(
-        word_list,
+    words = tuple(
+        (lemma, lang_code(code)) for lemma, code in zip(lemmas, lang_codes) if lemma
+    )
+    options = dict(
         allow_invalid=request.args.get("show_invalid"),
-        max_level=int(request.args["max_level"]),
-        max_count=int(request.args["max_count"]),
         reduce=not request.args.get("all_connections"),
         ignore_affixes=not request.args.get("expand_affixes"),
         merge=not request.args.get("keep_equivalences"),
         disambiguate=not request.args.get("no_disambiguation"),
+        direction="down" if request.args.get("descendants") else "up",
+        connect=bool(request.args.get("connect")),
+        allowed_links=frozenset(
+            Query.ALL_LINKS - Query.WEAK_LINKS
+            if request.args.get("no_weak_links")
+            else Query.ALL_LINKS
+        ),
+        languages=frozenset(request.args.get("languages", "").replace(",", " ").split())
+        or None,
+        reconstructed={"1": True, "0": False}.get(request.args.get("reconstructed")),
+        summarize=request.args.get("summarize", SUMMARIZE, type=int),
+    )
+    budgets = dict(
+        max_level=int(request.args["max_level"]),
+        max_count=int(request.args["max_count"]),
+        max_fetches=request.args.get("max_fetches", MAX_FETCHES, type=int),
+        max_nodes=request.args.get("max_nodes", MAX_NODES, type=int),
+        deadline=request.args.get("deadline", DEADLINE, type=float),
     )
-    return send_file(f"outputs/{q.filename}.pdf", as_attachment=False)
+
+    key = (words, tuple(options.items()))
+    q = queries.get(key)
+    resumed = False
+    if q is not None:
+        with q.lock:
+            if resumed := all(budgets[name] >= getattr(q, name) for name in GROWING):
+                if q.relaxes(**budgets):
+                    q.resume(**budgets, **kwargs)
+                elif kwargs.get("render", True) and not os.path.exists(pdf(q)):
+                    q.G.render(q.filename)
+    if not resumed:
+        q = Query([Word(*word) for word in words], **options, **budgets, **kwargs)
+    queries.add(key, q)
+    return q
+
+
+@app.route("/generate", methods=["GET"])
+@logged
+@traceable
+def generate():
+    return send_file(pdf(query()), as_attachment=False)
+
+
+@app.route("/generate.json", methods=["GET"])
+@logged
+@traceable
+def generate_json():
+    q = query(render=False)
+    return app.response_class(q.G.iter_json(), mimetype="application/json")
+
+
+@app.route("/stats", methods=["GET"])
+def stats():
+    return {
+        "pid": os.getpid(),
+        "render": renderer.stats(),
+        "pages": {
+            "count": len(Page.registry),
+            "live": Page.registry.live,
+            "size": Page.registry.size,
+            "live_size": Page.registry.live_size,
+            "max_size": Page.registry.max_size,
+        },
+        "api": API.stats,
+        "responses": {"size": API._cache.size, "max_size": API._cache.max_size},
+        "l2": API.l2 and API.l2.stats | {"circuit": API.l2.breaker.state},
+    }
+
+
+@app.errorhandler(RenderError)
+def render_error(error):
+    return str(error), 503
 
 
 if __name__ == "__main__":
+    warm_up()
     app.run(port=5000)